@@ -1,13 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from jose import JWTError, jwt
+from sqlalchemy.orm import Session, joinedload
 
 from . import models
+from .principal import authenticate
+from .permissions import load_effective_permissions, invalidate_user, has_permission
 
 from .database import get_db
 from . import security
-from ..core.config import settings
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -17,48 +17,56 @@ router = APIRouter(prefix="/admin", tags=["admin"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    user = db.query(models.User).filter(models.User.email == email).first()
-    if user is None:
-        raise credentials_exception
-    return user
+    # Revoked tokens are rejected before the principal cache is consulted
+    if security.is_token_blacklisted(token):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked. Please log in again.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return authenticate(db, token)
 
 def get_admin_user(current_user: models.User = Depends(get_current_user)):
     if not current_user.is_superuser:
         raise HTTPException(status_code=403, detail="Admin privileges required")
     return current_user
 
+def require_permission(name: str):
+    """Dependency factory: the current user must hold `name` (superusers always pass)"""
+    def check_permission(
+        db: Session = Depends(get_db),
+        current_user: models.User = Depends(get_current_user)
+    ):
+        if not current_user.is_superuser and not has_permission(db, current_user, name):
+            raise HTTPException(status_code=403, detail=f"Permission '{name}' required")
+        return current_user
+    return check_permission
+
 # Admin: List all users with role and permissions
 @router.get("/users")
-def list_users(db: Session = Depends(get_db), admin: models.User = Depends(get_admin_user)):
+def list_users(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    include_permissions: bool = Query(True),
+    db: Session = Depends(get_db),
+    admin: models.User = Depends(get_admin_user)
+):
     try:
-        users = db.query(models.User).all()
+        users = (
+            db.query(models.User)
+            .options(joinedload(models.User.role))
+            .order_by(models.User.id)
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+        permissions_by_user = (
+            load_effective_permissions(db, [user.id for user in users])
+            if include_permissions else {}
+        )
         result = []
         for user in users:
             role = user.role
-            # Collect permissions from role and direct user permissions if any
-            permissions_set = set()
-            # Permissions from role
-            for perm in role.permissions:
-                permission = db.query(models.Permission).filter(models.Permission.id == perm.permission_id).first()
-                if permission:
-                    permissions_set.add((permission.id, permission.name))
-            for perm in user.permissions:
-                permissions = db.query(models.Permission).filter(models.Permission.id == perm.permission_id).first()
-                if permissions:
-                    permissions_set.add((permissions.id, permissions.name))
-            permissions = [{"id": pid, "name": pname} for pid, pname in permissions_set]
             result.append({
                 "id": user.id,
                 "email": user.email,
@@ -66,8 +74,13 @@ def list_users(db: Session = Depends(get_db), admin: models.User = Depends(get_a
                 "is_active": user.is_active,
                 "is_superuser": user.is_superuser,
                 "is_verified": user.is_verified,
-                "role": role,
-                "permissions": permissions
+                "role": {
+                    "id": role.id,
+                    "name": role.name,
+                    "description": role.description,
+                    "created_at": role.created_at
+                },
+                "permissions": permissions_by_user.get(user.id, [])
             })
         logging.info(f"Fetched {len(result)} users from the database.")
         return result
@@ -86,6 +99,7 @@ def assign_role(user_id: int, role_id: int, db: Session = Depends(get_db), admin
     if role != user.role:
         user.role = role
         db.commit()
+        invalidate_user(user_id)
     return {"message": f"Role '{role.name}' assigned to user '{user.username}'"}
 
 # Admin: Change user permissions (add/remove)
@@ -100,6 +114,7 @@ def add_permission(user_id: int, permission_id: int, db: Session = Depends(get_d
         user_perm = UserPermission(user_id=user_id, permission_id=permission_id, is_active=True)
         db.add(user_perm)
         db.commit()
+        invalidate_user(user_id)
     return {"message": f"Permission '{perm.name}' added to user '{user.username}'"}
 
 @router.delete("/users/{user_id}/permissions/{permission_id}")
@@ -112,6 +127,7 @@ def remove_permission(user_id: int, permission_id: int, db: Session = Depends(ge
     if user_perm:
         db.delete(user_perm)
         db.commit()
+        invalidate_user(user_id)
     return {"message": "Permission removed from user."}
 
 # Admin: Delete user
@@ -122,4 +138,5 @@ def delete_user(user_id: int, db: Session = Depends(get_db), admin: models.User
         raise HTTPException(status_code=404, detail="User not found")
     db.delete(user)
     db.commit()
+    invalidate_user(user_id)
     return {"message": "User deleted."}
@@ -1,5 +1,6 @@
 # backend/app/auth/auth_routes.py - FIXED VERSION with decorator
 from fastapi import APIRouter, HTTPException, Depends, status, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from datetime import timedelta
@@ -11,9 +12,12 @@ from slowapi.util import get_remote_address
 from . import models, schemas
 from .database import get_db
 from . import security
+from .principal import authenticate, invalidate_token
+from .permissions import invalidate_user
 from ..core.config import settings
 from email.mime.text import MIMEText
 import uuid
+import time
 import smtplib
 import logging
 
@@ -86,7 +90,7 @@ async def signup(user: schemas.UserCreate, db: Session = Depends(get_db)):
             detail="Password must contain at least one special character."
         )
     # Hash password
-    hashed_password = security.get_password_hash(user.password)
+    hashed_password = await security.get_password_hash_async(user.password)
     token = str(uuid.uuid4())
 
     # Get the default role 'Viewer'
@@ -139,13 +143,21 @@ async def login(
     logging.info(f"Attempting login with email: {email}")
 
     user = db.query(models.User).filter(models.User.email == email).first()
-    if not user or not security.verify_password(password, user.hashed_password):
+    verified, new_hash = (False, None)
+    if user:
+        verified, new_hash = await security.verify_password_async(password, user.hashed_password)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Transparently upgrade hashes made with older cost settings
+    if new_hash:
+        user.hashed_password = new_hash
+        db.commit()
+    
     if not user.is_verified:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -215,11 +227,6 @@ async def refresh_token(current_token: str = Depends(oauth2_scheme), db: Session
 
 def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
     """Get current authenticated user, with token blacklist check"""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
     # Blacklist check
     if security.is_token_blacklisted(token):
         raise HTTPException(
@@ -227,23 +234,29 @@ def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_
             detail="Token has been revoked. Please log in again.",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    user = db.query(models.User).filter(models.User.email == email).first()
-    if user is None:
-        raise credentials_exception
-    return user
+    return authenticate(db, token)
 
 
 @router.post("/auth/logout")
 def logout(token: str = Depends(oauth2_scheme)):
     """Logout endpoint: Blacklist the current token"""
-    security.blacklist_token(token)
+    try:
+        # An already expired token needs no revocation entry, but is still a valid logout
+        payload = jwt.decode(
+            token,
+            settings.JWT_SECRET_KEY,
+            algorithms=[settings.JWT_ALGORITHM],
+            options={"verify_exp": False}
+        )
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if payload.get("exp") and payload["exp"] > time.time():
+        security.blacklist_token(token, payload["exp"])
+    invalidate_token(token)
     return {"message": "Logged out. Token has been revoked."}
 
 @router.get("/auth/me", response_model=schemas.User)
@@ -290,6 +303,7 @@ async def assign_role_to_user(
     logging.info(f"Assigning role {role.name} to user {user.username}")
     user.role = role
     db.commit()
+    await run_in_threadpool(invalidate_user, user_id)
     return {"message": "Role assigned successfully"}
 
 @router.get("/users/{user_id}/role")
@@ -73,3 +73,12 @@ class UserPermission(Base):
     # Relationships
     user = relationship("User", back_populates="permissions")
     permission = relationship("Permission", back_populates="user_permissions")
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+    # Revocations only matter until the token expires, so crash safety is traded for cheap writes
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+
+    token_hash = Column(String(64), primary_key=True)  # sha256 of the raw token
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
@@ -0,0 +1,141 @@
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from . import models
+from .principal import invalidate_principal
+from ..dashboard.notifications import on_invalidation, publish_invalidation
+from ..core.cache import TTLCache
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Materialized role + direct permissions per user id, as listed by the admin API
+effective_permissions_cache = TTLCache(
+    maxsize=settings.PERMISSIONS_CACHE_SIZE,
+    ttl=settings.PERMISSIONS_CACHE_TTL_SECONDS
+)
+
+def load_effective_permissions(db: Session, user_ids: Iterable[int]) -> Dict[int, List[dict]]:
+    """Role and direct permissions for many users, from one UNION query for the uncached ones"""
+    result = {}
+    missing = []
+    for user_id in user_ids:
+        cached = effective_permissions_cache.get(user_id)
+        if cached is None:
+            missing.append(user_id)
+        else:
+            result[user_id] = cached
+
+    if missing:
+        role_permissions = db.query(
+            models.User.id, models.Permission.id, models.Permission.name
+        ).join(
+            models.RolePermission, models.RolePermission.role_id == models.User.role_id
+        ).join(
+            models.Permission, models.Permission.id == models.RolePermission.permission_id
+        ).filter(models.User.id.in_(missing))
+        user_permissions = db.query(
+            models.UserPermission.user_id, models.Permission.id, models.Permission.name
+        ).join(
+            models.Permission, models.Permission.id == models.UserPermission.permission_id
+        ).filter(models.UserPermission.user_id.in_(missing))
+
+        loaded = {user_id: [] for user_id in missing}
+        for user_id, permission_id, name in role_permissions.union(user_permissions).all():
+            loaded[user_id].append({"id": permission_id, "name": name})
+        for user_id, permissions in loaded.items():
+            effective_permissions_cache.set(user_id, permissions)
+        result.update(loaded)
+
+    return result
+
+# Compiled authorization: permission ids double as bit positions, so a
+# role's or user's permissions collapse into one int and a check is a mask test
+role_masks = TTLCache(maxsize=256, ttl=settings.PERMISSIONS_CACHE_TTL_SECONDS)
+user_masks = TTLCache(
+    maxsize=settings.PERMISSIONS_CACHE_SIZE,
+    ttl=settings.PERMISSIONS_CACHE_TTL_SECONDS
+)
+_permission_ids: Optional[Dict[str, int]] = None
+_permission_ids_lock = threading.Lock()
+_unknown_permissions: Set[str] = set()
+
+def reload_permission_ids(db: Session) -> None:
+    """Rebuild the permission name -> id map; run at startup and whenever permissions are created or deleted"""
+    global _permission_ids
+    rows = db.query(models.Permission.id, models.Permission.name).all()
+    # Swapped in whole, so readers never see a partly built map
+    _permission_ids = {perm_name: perm_id for perm_id, perm_name in rows}
+    _unknown_permissions.clear()
+
+def permission_bit(db: Session, name: str) -> int:
+    """Bit of a permission by name, or 0 if no such permission exists"""
+    if _permission_ids is None:
+        with _permission_ids_lock:
+            if _permission_ids is None:
+                reload_permission_ids(db)
+    permission_id = _permission_ids.get(name)
+    if permission_id is None:
+        # Unknown names (e.g. a typo in require_permission) are denied from the map, without a query
+        if name not in _unknown_permissions:
+            _unknown_permissions.add(name)
+            logger.warning(f"Permission check for unknown permission '{name}'")
+        return 0
+    return 1 << permission_id
+
+def role_mask(role: models.Role) -> int:
+    mask = role_masks.get(role.id)
+    if mask is None:
+        mask = 0
+        for role_permission in role.permissions:
+            mask |= 1 << role_permission.permission_id
+        role_masks.set(role.id, mask)
+    return mask
+
+def user_mask(user: models.User) -> int:
+    """Role permissions plus active, unexpired direct permissions of a loaded principal"""
+    mask = user_masks.get(user.id)
+    if mask is not None:
+        return mask
+
+    now = datetime.now(timezone.utc)
+    mask = role_mask(user.role)
+    next_expiry: Optional[datetime] = None
+    for user_permission in user.permissions:
+        if not user_permission.is_active:
+            continue
+        expires_at = user_permission.expires_at
+        if expires_at is not None:
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            if expires_at <= now:
+                continue
+            next_expiry = expires_at if next_expiry is None else min(next_expiry, expires_at)
+        mask |= 1 << user_permission.permission_id
+
+    # Recompile as soon as the next direct permission expires
+    ttl = user_masks.ttl
+    if next_expiry is not None:
+        ttl = min(ttl, (next_expiry - now).total_seconds())
+    user_masks.set(user.id, mask, ttl)
+    return mask
+
+def has_permission(db: Session, user: models.User, name: str) -> bool:
+    bit = permission_bit(db, name)
+    return bit != 0 and bool(user_mask(user) & bit)
+
+def _drop_user(user_id: int) -> None:
+    invalidate_principal(user_id)
+    effective_permissions_cache.pop(user_id)
+    user_masks.pop(user_id)
+
+on_invalidation("user", lambda key: _drop_user(int(key)))
+
+def invalidate_user(user_id: int) -> None:
+    """Drop everything cached about a user's identity and permissions, in every worker (blocking)"""
+    _drop_user(user_id)
+    publish_invalidation("user", str(user_id))
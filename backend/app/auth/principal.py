@@ -0,0 +1,76 @@
+import hashlib
+import time
+from typing import Optional
+
+from fastapi import HTTPException, status
+from jose import JWTError, jwt
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from . import models
+from ..core.cache import TTLCache
+from ..core.config import settings
+
+# Authenticated users keyed by a hash of their bearer token. Entries hold
+# detached User objects with role and permissions already loaded.
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+def token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def load_principal(db: Session, email: str) -> Optional[models.User]:
+    """Fetch a user with role, role permissions and direct permissions in one round of eager loads"""
+    user = db.query(models.User).options(
+        joinedload(models.User.role)
+            .selectinload(models.Role.permissions)
+            .joinedload(models.RolePermission.permission),
+        selectinload(models.User.permissions)
+            .joinedload(models.UserPermission.permission),
+    ).filter(models.User.email == email).first()
+    if user is not None:
+        # Detach so the cached instance outlives this request's session
+        db.expunge(user)
+    return user
+
+def authenticate(db: Session, token: str) -> models.User:
+    """Resolve a bearer token to its user, serving repeat requests from the principal cache"""
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    key = token_key(token)
+    user = principal_cache.get(key)
+    if user is not None:
+        return user
+
+    try:
+        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+        email: str = payload.get("sub")
+        if email is None:
+            raise credentials_exception
+    except JWTError:
+        raise credentials_exception
+    user = load_principal(db, email)
+    if user is None:
+        raise credentials_exception
+
+    # Never keep a principal past its token's expiry
+    ttl = principal_cache.ttl
+    if payload.get("exp") is not None:
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        principal_cache.set(key, user, ttl)
+    return user
+
+def invalidate_principal(user_id: int) -> None:
+    """Drop cached principals of a user after their role, permissions or account change"""
+    principal_cache.pop_where(lambda _, user: user.id == user_id)
+
+def invalidate_token(token: str) -> None:
+    principal_cache.pop(token_key(token))
+
+def invalidate_all_principals() -> None:
+    principal_cache.clear()
@@ -0,0 +1,106 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from . import models
+from .database import SessionLocal
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Rows committed by concurrent transactions can carry a revoked_at slightly
+# older than the last one seen, so each sync re-reads this much history
+SYNC_OVERLAP = timedelta(seconds=30)
+
+class TokenRevocationStore:
+    """
+    Revoked tokens shared through the auth database
+
+    Every worker keeps a local {token_hash: exp} map that answers checks
+    without I/O, and pulls revocations made by other workers on a short
+    interval. Entries disappear locally and in the table once the token
+    would have expired anyway.
+    """
+
+    def __init__(self):
+        self._revoked = {}
+        self._lock = threading.Lock()
+        self._high_water = None
+
+    @staticmethod
+    def token_hash(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def is_revoked(self, token: str) -> bool:
+        expires_at = self._revoked.get(self.token_hash(token))
+        return expires_at is not None and expires_at > time.time()
+
+    def revoke(self, token: str, expires_at: float) -> None:
+        """Revoke a token until its exp (epoch seconds)"""
+        token_hash = self.token_hash(token)
+        with self._lock:
+            self._revoked[token_hash] = expires_at
+
+        db = SessionLocal()
+        try:
+            db.execute(
+                pg_insert(models.RevokedToken)
+                .values(
+                    token_hash=token_hash,
+                    expires_at=datetime.fromtimestamp(expires_at, tz=timezone.utc)
+                )
+                .on_conflict_do_nothing(index_elements=["token_hash"])
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def sync(self) -> None:
+        """Pull revocations recorded since the last sync and drop expired entries"""
+        now = datetime.now(timezone.utc)
+        db = SessionLocal()
+        try:
+            query = db.query(
+                models.RevokedToken.token_hash,
+                models.RevokedToken.expires_at,
+                models.RevokedToken.revoked_at
+            ).filter(models.RevokedToken.expires_at > now)
+            if self._high_water is not None:
+                query = query.filter(models.RevokedToken.revoked_at > self._high_water - SYNC_OVERLAP)
+            rows = query.all()
+
+            # Expired revocations can no longer be presented as valid tokens
+            db.query(models.RevokedToken).filter(
+                models.RevokedToken.expires_at <= now
+            ).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+        with self._lock:
+            for token_hash, expires_at, revoked_at in rows:
+                self._revoked[token_hash] = expires_at.timestamp()
+                if self._high_water is None or revoked_at > self._high_water:
+                    self._high_water = revoked_at
+            cutoff = now.timestamp()
+            # Rebuild rather than mutate so lock-free readers never see a dict being resized
+            self._revoked = {h: exp for h, exp in self._revoked.items() if exp > cutoff}
+            if self._high_water is None:
+                self._high_water = now
+
+    async def run_sync_loop(self):
+        """Periodically sync with the shared table; started from the app lifespan"""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, self.sync)
+            except Exception as e:
+                logger.error(f"Token revocation sync failed: {e}")
+            await asyncio.sleep(settings.TOKEN_REVOCATION_SYNC_SECONDS)
+
+revocation_store = TokenRevocationStore()
@@ -1,24 +1,34 @@
 import threading
+from .revocation import revocation_store
 
-# In-memory set for blacklisted tokens (thread-safe)
-blacklisted_tokens = set()
-blacklist_lock = threading.Lock()
-
-def blacklist_token(token: str):
-    with blacklist_lock:
-        blacklisted_tokens.add(token)
+def blacklist_token(token: str, expires_at: float):
+    """Revoke a token until its exp (epoch seconds)"""
+    revocation_store.revoke(token, expires_at)
 
 def is_token_blacklisted(token: str) -> bool:
-    with blacklist_lock:
-        return token in blacklisted_tokens
+    return revocation_store.is_revoked(token)
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
 from jose import jwt
 from passlib.context import CryptContext
 from ..core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes made with fewer rounds are flagged by needs_update() and upgraded on login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+# bcrypt releases the GIL, so a small thread pool keeps it off the event loop.
+# The semaphore bounds running + queued jobs; beyond that callers get a 503.
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+password_slots = threading.BoundedSemaphore(
+    settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_SIZE
+)
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -26,6 +36,31 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+async def run_password_job(func, *args):
+    """Run a hashing call on the password pool, rejecting work once the queue is full"""
+    if not password_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service is busy. Please retry shortly.",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        job = password_executor.submit(func, *args)
+    except BaseException:
+        password_slots.release()
+        raise
+    # Released when the job itself ends, not when the caller stops waiting: a
+    # disconnected client must not free a slot while its hash still runs or waits
+    job.add_done_callback(lambda _: password_slots.release())
+    return await asyncio.wrap_future(job)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify off the event loop; also returns a new hash when the stored one uses outdated settings"""
+    return await run_password_job(pwd_context.verify_and_update, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await run_password_job(pwd_context.hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
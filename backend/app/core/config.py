@@ -17,6 +17,14 @@ class Settings(BaseSettings):
     DASHBOARD_POSTGRES_PASSWORD: str
     DASHBOARD_POSTGRES_DB: str
     
+    # Connection pools (per engine)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: int = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 30000
+    
     # JWT Settings
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str
@@ -33,6 +41,52 @@ class Settings(BaseSettings):
     CORS_ORIGINS: list
     PASSWORD_SALT: str
     
+    TOKEN_REVOCATION_SYNC_SECONDS: int = 2
+    
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_SIZE: int = 64
+    
+    # Caching. Invalidations reach every worker over Postgres NOTIFY; these TTLs
+    # bound how stale a worker gets if it misses one (listener reconnecting)
+    DASHBOARD_CACHE_TTL_SECONDS: int = 30
+    STATS_CACHE_TTL_SECONDS: int = 15
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_SIZE: int = 4096
+    PERMISSIONS_CACHE_TTL_SECONDS: int = 300
+    PERMISSIONS_CACHE_SIZE: int = 10000
+    INWI_ANALYSIS_CACHE_SIZE: int = 256
+    INWI_ANALYSIS_CACHE_TTL_SECONDS: int = 86400
+    # Optional on-disk tier for inwi analysis results; empty disables it
+    INWI_ANALYSIS_CACHE_DIR: str = ""
+    
+    # inwi uploads: files above INWI_MAX_UPLOAD_MB are only accepted for report
+    # types analyzed in chunks of INWI_CSV_CHUNK_ROWS rows
+    INWI_MAX_UPLOAD_MB: int = 10
+    INWI_MAX_CHUNKED_UPLOAD_MB: int = 2048
+    INWI_CSV_CHUNK_ROWS: int = 200000
+    # Worker processes running inwi analysis, extra jobs allowed to wait, per-job limit
+    INWI_ANALYSIS_WORKERS: int = 2
+    INWI_ANALYSIS_QUEUE_SIZE: int = 8
+    INWI_ANALYSIS_TIMEOUT_SECONDS: int = 120
+    # CSV files accepted in one /upload-batch request, after expanding zip archives
+    INWI_BATCH_MAX_FILES: int = 20
+    # Worker processes rendering PDF/PNG exports, extra jobs allowed to wait, per-job limit
+    INWI_EXPORT_WORKERS: int = 2
+    INWI_EXPORT_QUEUE_SIZE: int = 8
+    INWI_EXPORT_TIMEOUT_SECONDS: int = 60
+    # Rendered exports reused for identical payloads; empty dir means <tmp>/inwi-exports.
+    # Files unused for the TTL, then least recently used ones over the size cap, are deleted
+    INWI_EXPORT_CACHE_DIR: str = ""
+    INWI_EXPORT_CACHE_MAX_MB: int = 512
+    INWI_EXPORT_CACHE_TTL_SECONDS: int = 86400
+    INWI_EXPORT_CACHE_CLEANUP_SECONDS: int = 600
+    
+    # KPI push updates
+    KPI_STREAM_HEARTBEAT_SECONDS: int = 15
+    KPI_STREAM_QUEUE_SIZE: int = 100
+    
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional
+
+from fastapi import HTTPException, Request, status
+
+logger = logging.getLogger(__name__)
+
+# How often a running job checks whether its client went away
+DISCONNECT_POLL_SECONDS = 0.5
+
+def _ready():
+    """No-op job used to spawn a worker and run its initializer ahead of real work"""
+    return None
+
+class _WorkerSlot:
+    """One worker process; killed and lazily respawned when a job is abandoned"""
+
+    def __init__(self, name: str, context, initializer: Optional[Callable]):
+        self.name = name
+        self._context = context
+        self._initializer = initializer
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=1, mp_context=self._context, initializer=self._initializer
+            )
+        return self._executor
+
+    def submit(self, func: Callable, *args) -> asyncio.Future:
+        return asyncio.wrap_future(self._get_executor().submit(func, *args))
+
+    def start(self):
+        """Spawn the worker now rather than on its first job"""
+        self._get_executor().submit(_ready)
+
+    def kill(self):
+        """Terminate the worker mid-job; the next submit starts a fresh process"""
+        if self._executor is None:
+            return
+        for process in list(self._executor._processes.values()):
+            process.kill()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+class ProcessWorkerPool:
+    """
+    Runs CPU-heavy jobs in spawned worker processes, off the event loop
+
+    At most `workers` jobs run at once and `queue_size` more may wait for a
+    slot; beyond that callers get a 503. A job that exceeds its timeout, or
+    whose client disconnects, has its worker process killed and replaced.
+
+    Workers start on first use unless start() is called, which spawns them
+    (and runs `initializer`) up front and keeps replacements warm too.
+    """
+
+    def __init__(self, name: str, workers: int, queue_size: int, timeout: float,
+                 initializer: Optional[Callable] = None):
+        self.name = name
+        self.workers = workers
+        self.timeout = timeout
+        self._capacity = workers + queue_size
+        self._admitted = 0
+        self._started = False
+        context = multiprocessing.get_context("spawn")
+        self._slots: List[_WorkerSlot] = [
+            _WorkerSlot(f"{name}-{i}", context, initializer) for i in range(workers)
+        ]
+        self._free: Optional[asyncio.Queue] = None
+
+    def start(self):
+        """Spawn every worker in the background; returns without waiting for them"""
+        self._started = True
+        for slot in self._slots:
+            slot.start()
+
+    def _abandon(self, slot: _WorkerSlot, job: asyncio.Future):
+        # Cancelled so the BrokenProcessPool error from the kill is not reported as unretrieved
+        job.cancel()
+        slot.kill()
+        if self._started:
+            slot.start()
+
+    def _free_slots(self) -> asyncio.Queue:
+        # Created on first use so it binds to the running event loop
+        if self._free is None:
+            self._free = asyncio.Queue()
+            for slot in self._slots:
+                self._free.put_nowait(slot)
+        return self._free
+
+    async def run(self, func: Callable, *args, request: Optional[Request] = None,
+                  timeout: Optional[float] = None):
+        """Run func(*args) in a worker process and return its result"""
+        if self._admitted >= self._capacity:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Service is busy. Please retry shortly.",
+                headers={"Retry-After": "5"},
+            )
+        self._admitted += 1
+        try:
+            free = self._free_slots()
+            slot = await free.get()
+            try:
+                return await self._run_in_slot(slot, func, args, request, timeout or self.timeout)
+            finally:
+                free.put_nowait(slot)
+        finally:
+            self._admitted -= 1
+
+    async def _run_in_slot(self, slot: _WorkerSlot, func: Callable, args: tuple,
+                           request: Optional[Request], timeout: float):
+        job = slot.submit(func, *args)
+        watchers = {job}
+        disconnect = None
+        if request is not None:
+            disconnect = asyncio.ensure_future(self._wait_for_disconnect(request))
+            watchers.add(disconnect)
+        try:
+            done, _ = await asyncio.wait(watchers, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            self._abandon(slot, job)
+            raise
+        finally:
+            if disconnect is not None:
+                disconnect.cancel()
+
+        if job in done:
+            return job.result()
+
+        self._abandon(slot, job)
+        if disconnect is not None and disconnect in done:
+            logger.info(f"{slot.name}: client disconnected, job cancelled")
+            raise HTTPException(status_code=499, detail="Client closed request")
+        logger.warning(f"{slot.name}: job exceeded {timeout}s and was killed")
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=f"Processing timed out after {timeout:g}s",
+        )
+
+    @staticmethod
+    async def _wait_for_disconnect(request: Request):
+        while not await request.is_disconnected():
+            await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+
+    def shutdown(self):
+        for slot in self._slots:
+            slot.shutdown()
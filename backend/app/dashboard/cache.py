@@ -0,0 +1,12 @@
+from ..core.cache import TTLCache
+from ..core.config import settings
+
+# Assembled /kpi-values/dashboard payloads, keyed by role level
+kpi_dashboard_cache = TTLCache(maxsize=16, ttl=settings.DASHBOARD_CACHE_TTL_SECONDS)
+
+# /stats payloads, keyed by exact/approximate log count mode
+stats_cache = TTLCache(maxsize=2, ttl=settings.STATS_CACHE_TTL_SECONDS)
+
+def invalidate_kpi_dashboard():
+    """Drop cached dashboard payloads after new kpi_values rows are written"""
+    kpi_dashboard_cache.clear()
@@ -1,18 +1,29 @@
 # backend/app/dashboard/admin_routes.py - NEW FILE
 from fastapi import APIRouter, HTTPException, Depends, status, Query, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 import httpx
 import hashlib
 import os
+import io
+import asyncio
+import ipaddress
+import csv
 import json
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime, timezone
-from sqlalchemy import func
+from sqlalchemy import Float, case, cast, func, or_, text
+from sqlalchemy.dialects.postgresql import INET, INTERVAL
 from sqlalchemy.orm import Session
 import re
 import aiofiles
 
 from . import models, schemas
-from .database import get_db
+from .database import get_db, SessionLocal
+from .cache import kpi_dashboard_cache, stats_cache, invalidate_kpi_dashboard
+from .notifications import kpi_broadcaster
+from ..core.config import settings
+from ..core.time_buckets import is_valid_bucket
 from ..auth.admin_routes import get_current_user, get_admin_user
 from ..auth import models as auth_models
 
@@ -27,7 +38,7 @@ def secure_filename(filename: str) -> str:
 # ==================== KPI MANAGEMENT ====================
 
 @router.get("/kpis", response_model=List[schemas.KPI])
-async def get_all_kpis(
+def get_all_kpis(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, le=1000),
     db: Session = Depends(get_db),
@@ -45,7 +56,7 @@ async def get_all_kpis(
     return kpis
 
 @router.get("/kpis/{kpi_id}", response_model=schemas.KPI)
-async def get_kpi(
+def get_kpi(
     kpi_id: int,
     db: Session = Depends(get_db),
     current_user: auth_models.User = Depends(get_current_user)
@@ -57,7 +68,7 @@ async def get_kpi(
     return kpi
 
 @router.post("/kpis", response_model=schemas.KPI)
-async def create_kpi(
+def create_kpi(
     kpi: schemas.KPICreate,
     db: Session = Depends(get_db),
     admin: auth_models.User = Depends(get_admin_user)
@@ -81,10 +92,11 @@ async def create_kpi(
     db.add(new_kpi)
     db.commit()
     db.refresh(new_kpi)
+    invalidate_kpi_dashboard()
     return new_kpi
 
 @router.put("/kpis/{kpi_id}", response_model=schemas.KPI)
-async def update_kpi(
+def update_kpi(
     kpi_id: int,
     kpi_update: schemas.KPICreate,
     db: Session = Depends(get_db),
@@ -115,10 +127,11 @@ async def update_kpi(
     
     db.commit()
     db.refresh(kpi)
+    invalidate_kpi_dashboard()
     return kpi
 
 @router.delete("/kpis/{kpi_id}")
-async def delete_kpi(
+def delete_kpi(
     kpi_id: int,
     db: Session = Depends(get_db),
     admin: auth_models.User = Depends(get_admin_user)
@@ -138,12 +151,13 @@ async def delete_kpi(
     
     db.delete(kpi)
     db.commit()
+    invalidate_kpi_dashboard()
     return {"message": f"KPI '{kpi.name}' deleted successfully"}
 
 # ==================== TOOL MANAGEMENT ====================
 
 @router.get("/tools", response_model=List[schemas.Tool])
-async def get_all_tools(
+def get_all_tools(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, le=1000),
     category: Optional[str] = Query(None, description="Filter by category"),
@@ -164,7 +178,7 @@ async def get_all_tools(
     return tools
 
 @router.get("/tools/{tool_id}", response_model=schemas.Tool)
-async def get_tool(
+def get_tool(
     tool_id: int,
     db: Session = Depends(get_db),
     admin: auth_models.User = Depends(get_current_user)
@@ -176,7 +190,7 @@ async def get_tool(
     return tool
 
 @router.post("/tools", response_model=schemas.Tool)
-async def create_tool(
+def create_tool(
     tool: schemas.ToolCreate,
     db: Session = Depends(get_db),
     admin: auth_models.User = Depends(get_admin_user)
@@ -203,7 +217,7 @@ async def create_tool(
     return new_tool
 
 @router.put("/tools/{tool_id}", response_model=schemas.Tool)
-async def update_tool(
+def update_tool(
     tool_id: int,
     tool_update: schemas.ToolCreate,
     db: Session = Depends(get_db),
@@ -237,7 +251,7 @@ async def update_tool(
     return tool
 
 @router.delete("/tools/{tool_id}")
-async def delete_tool(
+def delete_tool(
     tool_id: int,
     db: Session = Depends(get_db),
     admin: auth_models.User = Depends(get_admin_user)
@@ -262,97 +276,179 @@ async def delete_tool(
 # ==================== Dashboard ====================
 
 @router.get("/stats")
-async def get_dashboard_stats(
+def get_dashboard_stats(
+    exact: bool = Query(False, description="Use an exact COUNT(*) for log totals instead of the planner estimate"),
     db: Session = Depends(get_db),
     admin: auth_models.User = Depends(get_current_user)
 ):
     """Get dashboard statistics for admin"""
     
+    cached = stats_cache.get(exact)
+    if cached is not None:
+        return cached
+    
     try:
-        # KPI statistics
-        total_kpis = db.query(models.KPI).count()
-        kpis_by_level = {}
-        for level in ['operational', 'managerial', 'strategic']:
-            count = db.query(models.KPI).filter(models.KPI.level.ilike(f"%{level}%")).count()
-            kpis_by_level[level] = count
+        # KPI and tool statistics in one grouped pass
+        rows = db.execute(text("""
+            SELECT 'kpi' AS source, lower(level) AS bucket, COUNT(*) AS count FROM kpis GROUP BY lower(level)
+            UNION ALL
+            SELECT 'tool', category, COUNT(*) FROM tools GROUP BY category
+        """)).fetchall()
         
-        # Tool statistics
-        total_tools = db.query(models.Tool).count()
-        tools_by_category = db.query(
-            models.Tool.category, 
-            func.count(models.Tool.id).label('count')
-        ).group_by(models.Tool.category).all()
+        kpis_by_level = {level: 0 for level in ['operational', 'managerial', 'strategic']}
+        total_kpis = 0
+        tools_by_category = {}
+        total_tools = 0
+        for source, bucket, count in rows:
+            if source == 'kpi':
+                total_kpis += count
+                for level in kpis_by_level:
+                    if bucket and level in bucket:
+                        kpis_by_level[level] += count
+            else:
+                total_tools += count
+                tools_by_category[bucket] = count
         
         # Log statistics
-        total_logs = db.query(models.Log).count()
+        total_logs, is_estimate = count_logs(db, exact)
         today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-        recent_logs = db.query(models.Log).filter(
+        recent_logs = db.query(func.count(models.Log.id)).filter(
             models.Log.created_at >= today_start
-        ).count()
+        ).scalar()
         
-        return {
+        payload = {
             "kpis": {
                 "total": total_kpis,
                 "by_level": kpis_by_level
             },
             "tools": {
                 "total": total_tools,
-                "by_category": {cat: count for cat, count in tools_by_category}
+                "by_category": tools_by_category
             },
             "logs": {
                 "total": total_logs,
-                "today": recent_logs
+                "today": recent_logs,
+                "total_is_estimate": is_estimate
             },
             "updated_at": datetime.now(timezone.utc).isoformat()
         }
+        stats_cache.set(exact, payload)
+        return payload
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching dashboard stats: {str(e)}")
 
+def count_logs(db: Session, exact: bool):
+    """Row count of logs and whether it is an estimate, from planner statistics unless exact is requested"""
+    if not exact:
+        # reltuples is -1 (PG14+) or 0 until the table has been analyzed
+        estimate = db.execute(text(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = 'logs'::regclass"
+        )).scalar()
+        if estimate and estimate > 0:
+            return estimate, True
+    return db.query(func.count(models.Log.id)).scalar(), False
+
 @router.get("/kpi-values/dashboard")
-async def get_dashboard_kpi_values(
+def get_dashboard_kpi_values(
     db: Session = Depends(get_db),
     current_user: auth_models.User = Depends(get_current_user),
 ):
     """Get the latest and previous values for all KPIs for dashboard display"""
     
-    # Get the two most recent values for each KPI
-    kpi_data = []
+    user_level = get_user_level(current_user)
     
-    # Filter KPIs based on user role
-    query = db.query(models.KPI)
+    cached = kpi_dashboard_cache.get(user_level)
+    if cached is not None:
+        return cached
+    
+    payload = build_dashboard_kpi_values(db, user_level)
+    kpi_dashboard_cache.set(user_level, payload)
+    return payload
+
+@router.get("/kpi-values/stream")
+async def stream_dashboard_kpi_values(
+    current_user: auth_models.User = Depends(get_current_user),
+):
+    """Server-Sent Events: a full snapshot on connect, then diffs whenever KPI values are written"""
+    user_level = get_user_level(current_user)
+    # No request-scoped session: yield dependencies are only closed once the
+    # stream ends, which would hold a pooled connection for the whole stream
+    snapshot = await run_in_threadpool(
+        kpi_dashboard_cache.get_or_set,
+        user_level, lambda: build_dashboard_kpi_snapshot(user_level)
+    )
+    queue = kpi_broadcaster.subscribe(user_level, snapshot)
+
+    async def event_stream():
+        try:
+            yield format_sse("snapshot", snapshot)
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        queue.get(), timeout=settings.KPI_STREAM_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(message["event"], message["data"])
+        finally:
+            kpi_broadcaster.unsubscribe(user_level, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def get_user_level(user: auth_models.User) -> Optional[str]:
+    """KPI level visible to a user's role; None means every level"""
     role_level_map = {
         "viewer": "operational",
         "operational": "operational",
         "managerial": "managerial",
         "strategic": "strategic"
     }
-    user_level = role_level_map.get(current_user.role.name.lower())
+    return role_level_map.get(user.role.name.lower())
+
+def build_dashboard_kpi_snapshot(user_level: Optional[str]) -> dict:
+    """Dashboard KPI payload built in a short-lived session, closed before returning"""
+    db = SessionLocal()
+    try:
+        return build_dashboard_kpi_values(db, user_level)
+    finally:
+        db.close()
+
+def build_dashboard_kpi_values(db: Session, user_level: Optional[str]) -> dict:
+    """Assemble the dashboard KPI payload for one role level"""
+    kpi_data = []
+    
+    # Current and previous values come from kpi_latest, so this stays one query
+    # no matter how much history kpi_values holds
+    query = db.query(models.KPI, models.KPILatest).outerjoin(
+        models.KPILatest, models.KPILatest.kpi_id == models.KPI.id
+    )
+    
     if user_level:
         query = query.filter(models.KPI.level.ilike(f"%{user_level}%"))
     
-    kpis = query.all()
-    
-    for kpi in kpis:
-        # Get the two most recent values for this KPI
-        recent_values = db.query(models.KPIValue).filter(
-            models.KPIValue.kpi_id == kpi.id
-        ).order_by(
-            models.KPIValue.timestamp.desc()
-        ).limit(2).all()
-        
+    for kpi, latest in query.all():
         current_value = None
         previous_value = None
         last_calculated_date = None
         
-        if recent_values:
-            current_value = recent_values[0].value
+        if latest:
+            current_value = latest.current_value
             if kpi.reporting_format.lower() == "number":
                 current_value = current_value['value']
 
-            last_calculated_date = recent_values[0].timestamp
-            if len(recent_values) > 1:
-                previous_value = recent_values[1].value
+            last_calculated_date = latest.current_calculated_at
+            if latest.previous_value is not None:
+                previous_value = latest.previous_value
                 if kpi.reporting_format.lower() == "number":
                     previous_value = previous_value['value']
         
@@ -406,6 +502,97 @@ async def trigger_kpi_calculation(token: str) -> dict:
         logger.error(f"Error triggering KPI calculation: {str(e)}")
         return {'error':'Error triggering KPI calculation'}
 
+def save_file_record(db: Session, db_file: models.File) -> None:
+    db.add(db_file)
+    db.commit()
+    db.refresh(db_file)
+
+def store_findings(db: Session, db_file: models.File, tool_id: int, filename: str, findings: list) -> None:
+    """Insert parsed findings as logs and mark the file processed"""
+    for parsed_finding in findings:  # findings is now a list of {raw_finding, normalized_finding}
+        try:
+            raw_data = parsed_finding["raw_finding"]
+            normalized_data = parsed_finding["normalized_finding"]
+
+            # Convert datetime if present (from normalized data)
+            event_time = None
+            if normalized_data.get("event_time"):
+                try:
+                    event_time = datetime.fromisoformat(normalized_data["event_time"])
+                except ValueError:
+                    logger.warning(f"Invalid event_time format: {normalized_data['event_time']}")
+
+            ip_source, host = split_ip_or_host(normalized_data.get("ip_source"))
+
+            # Create log entry
+            db_log = models.Log(
+                file_id=db_file.id,
+                tool_id=tool_id,
+                status="success",
+                message=f"Parsed {filename} with tool ID {tool_id}",
+                raw_data=json.dumps(raw_data),          # Store original finding
+                parsed_data=json.dumps(normalized_data), # Store normalized data
+                event_time=event_time,
+                # Map normalized fields to database columns
+                action=normalized_data.get("action"),
+                attack_type=normalized_data.get("attack_type"),
+                policy=normalized_data.get("policy"),
+                bandwidth=normalized_data.get("bandwidth"),
+                ip_source=ip_source,
+                host=normalized_data.get("host") or host,
+                ip_destination=inet_or_none(normalized_data.get("ip_destination")),
+                severity=normalized_data.get("severity"),
+                cvss_base_score=normalized_data.get("cvss_base_score"),
+                vulnerability_name=normalized_data.get("vulnerability_name"),
+                malware_type=normalized_data.get("malware_type"),
+                quarantine_status=normalized_data.get("quarantine_status"),
+                log_type=normalized_data.get("log_type"),
+                app_name=normalized_data.get("app_name"),
+                country_code=normalized_data.get("country_code"),
+                # Free-text Nessus fields, indexed through logs.search_vector
+                details=raw_data.get("details") if isinstance(raw_data, dict) else None,
+                solution=raw_data.get("solution") if isinstance(raw_data, dict) else None
+            )
+            db.add(db_log)
+
+        except Exception as e:
+            logger.error(f"Error storing finding: {str(e)}")
+            continue
+
+    # Update file status to processed
+    db_file.status = "processed"
+    db.commit()
+
+def mark_file_failed(db: Session, db_file: models.File, tool_id: Optional[int] = None,
+                     message: Optional[str] = None, raw_data: Optional[str] = None) -> None:
+    """Mark an upload failed, logging the parser's error when there is one"""
+    # Discard anything a failed step left pending in the session
+    db.rollback()
+    db_file.status = "failed"
+    if message is not None:
+        db.add(models.Log(
+            file_id=db_file.id,
+            tool_id=tool_id,
+            status="failed",
+            message=message,
+            raw_data=raw_data
+        ))
+    db.commit()
+
+def store_calculated_kpis(db: Session, calculated_kpis: list) -> None:
+    for kpi in calculated_kpis:
+        try:
+            # Create KPI value record
+            kpi_value = models.KPIValue(
+                kpi_id=kpi["id"],
+                value=json.dumps(kpi["value"]),
+                timestamp=datetime.now(timezone.utc)
+            )
+            db.add(kpi_value)
+        except Exception as e:
+            logger.error(f"Error storing KPI value: {str(e)}")
+    db.commit()
+
 @router.post("/files/upload", response_model=schemas.FileUploadResponse)
 async def upload_file(
     file: UploadFile = File(...),
@@ -420,7 +607,7 @@ async def upload_file(
     
     # Read and save file
     contents = await file.read()
-    file_hash = hashlib.md5(contents).hexdigest()
+    file_hash = await run_in_threadpool(lambda: hashlib.md5(contents).hexdigest())
     
     # Sanitize filename
     safe_filename = secure_filename(file.filename)
@@ -449,9 +636,7 @@ async def upload_file(
         status="pending",
         md5_hash=file_hash
     )
-    db.add(db_file)
-    db.commit()
-    db.refresh(db_file)
+    await run_in_threadpool(save_file_record, db, db_file)
     
     # Send to parser service asynchronously
     token = authorization.split(" ")[1] if authorization else None
@@ -475,19 +660,8 @@ async def upload_file(
                 except Exception:
                     error_detail = response.text  # Fallback to raw response
                 logger.error(error_detail)
-                db_file.status = "failed"
-                db.commit()
-                
-                # Create error log
-                error_log = models.Log(
-                    file_id=db_file.id,
-                    tool_id=tool_id,
-                    status="failed",
-                    message=error_detail,
-                    raw_data=response.text
-                )
-                db.add(error_log)
-                db.commit()
+                # Mark the file failed and create an error log
+                await run_in_threadpool(mark_file_failed, db, db_file, tool_id, error_detail, response.text)
                 
                 raise HTTPException(
                     status_code=response.status_code,  # Preserve original status code
@@ -495,62 +669,15 @@ async def upload_file(
                 )
             
             # Parse response - expecting list of normalized findings
-            findings = response.json()["findings"]
+            findings = (await run_in_threadpool(response.json))["findings"]
             if not isinstance(findings, list):
                 error_msg = "Invalid response format from parser service"
                 logger.error(error_msg)
-                db_file.status = "failed"
-                db.commit()
+                await run_in_threadpool(mark_file_failed, db, db_file)
                 raise HTTPException(status_code=500, detail=error_msg)
             
-            # Store findings in database
-            for parsed_finding in findings:  # findings is now a list of {raw_finding, normalized_finding}
-                try:
-                    raw_data = parsed_finding["raw_finding"]
-                    normalized_data = parsed_finding["normalized_finding"]
-
-                    # Convert datetime if present (from normalized data)
-                    event_time = None
-                    if normalized_data.get("event_time"):
-                        try:
-                            event_time = datetime.fromisoformat(normalized_data["event_time"])
-                        except ValueError:
-                            logger.warning(f"Invalid event_time format: {normalized_data['event_time']}")
-
-                    # Create log entry
-                    db_log = models.Log(
-                        file_id=db_file.id,
-                        tool_id=tool_id,
-                        status="success",
-                        message=f"Parsed {file.filename} with tool ID {tool_id}",
-                        raw_data=json.dumps(raw_data),          # Store original finding
-                        parsed_data=json.dumps(normalized_data), # Store normalized data
-                        event_time=event_time,
-                        # Map normalized fields to database columns
-                        action=normalized_data.get("action"),
-                        attack_type=normalized_data.get("attack_type"),
-                        policy=normalized_data.get("policy"),
-                        bandwidth=normalized_data.get("bandwidth"),
-                        ip_source=normalized_data.get("ip_source"),
-                        ip_destination=normalized_data.get("ip_destination"),
-                        severity=normalized_data.get("severity"),
-                        cvss_base_score=normalized_data.get("cvss_base_score"),
-                        vulnerability_name=normalized_data.get("vulnerability_name"),
-                        malware_type=normalized_data.get("malware_type"),
-                        quarantine_status=normalized_data.get("quarantine_status"),
-                        log_type=normalized_data.get("log_type"),
-                        app_name=normalized_data.get("app_name"),
-                        country_code=normalized_data.get("country_code")
-                    )
-                    db.add(db_log)
-                    
-                except Exception as e:
-                    logger.error(f"Error storing finding: {str(e)}")
-                    continue
-            
-            # Update file status to processed
-            db_file.status = "processed"
-            db.commit()
+            # Store findings in database (off the event loop; large uploads hold thousands of rows)
+            await run_in_threadpool(store_findings, db, db_file, tool_id, file.filename, findings)
             
             logger.info(f"Successfully processed {len(findings)} findings from {file.filename}")
             
@@ -558,20 +685,12 @@ async def upload_file(
             calculation_result = await trigger_kpi_calculation(token)
             if calculation_result and not calculation_result.get('error'):
                 logger.info("KPI calculation completed successfully")
+                # The calculator has written new kpi_values rows
+                invalidate_kpi_dashboard()
                 # Store new KPI values
                 if calculation_result.get("calculated_kpis"):
-                    for kpi in calculation_result["calculated_kpis"]:
-                        try:
-                            # Create KPI value record
-                            kpi_value = models.KPIValue(
-                                kpi_id=kpi["id"],
-                                value=json.dumps(kpi["value"]),
-                                timestamp=datetime.now(timezone.utc)
-                            )
-                            db.add(kpi_value)
-                        except Exception as e:
-                            logger.error(f"Error storing KPI value: {str(e)}")
-                    db.commit()
+                    await run_in_threadpool(store_calculated_kpis, db, calculation_result["calculated_kpis"])
+                    invalidate_kpi_dashboard()
             else:
                 logger.warning("KPI calculation failed or returned no results")
                 raise HTTPException(
@@ -581,16 +700,16 @@ async def upload_file(
     except httpx.TimeoutException:
         error_msg = "Parser service timeout"
         logger.error(error_msg)
-        db_file.status = "failed"
-        db.commit()
+        await run_in_threadpool(mark_file_failed, db, db_file)
         raise HTTPException(status_code=504, detail=error_msg)
     except Exception as e:
         error_msg = f"Error processing file: {str(e)}"
         logger.error(error_msg)
-        db_file.status = "failed"
-        db.commit()
+        await run_in_threadpool(mark_file_failed, db, db_file)
         raise HTTPException(status_code=500, detail=error_msg)
     
+    # The commits above expired db_file; reload it here rather than lazily on the loop
+    await run_in_threadpool(db.refresh, db_file)
     return {
         "id": db_file.id,
         "filename": db_file.filename,
@@ -601,7 +720,7 @@ async def upload_file(
     }
 
 @router.get("/files", response_model=List[schemas.FileResponse])
-async def list_files(
+def list_files(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, le=1000),
     db: Session = Depends(get_db),
@@ -611,7 +730,7 @@ async def list_files(
     return files
 
 @router.get("/files/{file_id}", response_model=schemas.FileResponse)
-async def get_file(
+def get_file(
     file_id: int,
     db: Session = Depends(get_db),
     current_user: auth_models.User = Depends(get_current_user)
@@ -622,28 +741,362 @@ async def get_file(
         raise HTTPException(status_code=404, detail="File not found")
     return file
 
-@router.get("/files/{file_id}/logs", response_model=List[schemas.LogResponse])
-async def get_file_logs(
+# Columns that can be requested through ?fields= on the log endpoints
+LOG_FIELDS = {
+    column.name: column for column in models.Log.__table__.columns
+    if column.name != "search_vector"
+}
+DEFAULT_LOG_FIELDS = list(schemas.LogResponse.model_fields.keys())
+SEARCH_LOG_FIELDS = [
+    name for name in LOG_FIELDS if name not in ("raw_data", "parsed_data", "details", "solution")
+]
+LOG_EXPORT_BATCH_SIZE = 1000
+
+def resolve_log_fields(fields: Optional[str], default: List[str] = DEFAULT_LOG_FIELDS) -> List[str]:
+    """Validate a comma-separated ?fields= projection; id is always included for keyset pagination"""
+    if not fields:
+        names = default
+    else:
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in names if name not in LOG_FIELDS]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown log fields: {', '.join(unknown)}. Allowed: {', '.join(LOG_FIELDS)}"
+            )
+    return ["id"] + [name for name in dict.fromkeys(names) if name != "id"]
+
+def serialize_log_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (ipaddress.IPv4Address, ipaddress.IPv6Address)):
+        return str(value)
+    return value
+
+def inet_or_none(value: Optional[str]) -> Optional[str]:
+    """Normalized IP address for an INET column, or None when the value is not an address"""
+    if not value:
+        return None
+    try:
+        return str(ipaddress.ip_address(str(value).strip()))
+    except ValueError:
+        logger.warning(f"Ignoring invalid IP address: {value}")
+        return None
+
+def split_ip_or_host(value: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """(address, host) for a source field: addresses go to the INET column, anything else is a host name"""
+    if not value:
+        return None, None
+    value = str(value).strip()
+    try:
+        return str(ipaddress.ip_address(value)), None
+    except ValueError:
+        return None, value
+
+def parse_network(value: str, param: str):
+    try:
+        return ipaddress.ip_network(value.strip(), strict=False)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid IP address or CIDR for {param}: {value}")
+
+def get_file_or_404(db: Session, file_id: int) -> models.File:
+    file = db.query(models.File).filter(models.File.id == file_id).first()
+    if not file:
+        raise HTTPException(status_code=404, detail="File not found")
+    return file
+
+@router.get("/files/{file_id}/logs")
+def get_file_logs(
     file_id: int,
+    after_id: Optional[int] = Query(None, ge=0, description="Return logs with an id greater than this cursor"),
+    limit: int = Query(500, ge=1, le=5000),
+    fields: Optional[str] = Query(None, description="Comma-separated log columns to return"),
+    db: Session = Depends(get_db),
+    current_user: auth_models.User = Depends(get_current_user)
+):
+    """Page through a file's logs ordered by id; pass next_after_id back as after_id for the next page"""
+    names = resolve_log_fields(fields)
+    get_file_or_404(db, file_id)
+
+    query = db.query(*[LOG_FIELDS[name] for name in names]).filter(models.Log.file_id == file_id)
+    if after_id is not None:
+        query = query.filter(models.Log.id > after_id)
+    # Fetch one extra row to know whether another page exists
+    rows = query.order_by(models.Log.id).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    items = [
+        {name: serialize_log_value(value) for name, value in zip(names, row)}
+        for row in rows
+    ]
+    return {
+        "items": items,
+        "count": len(items),
+        "has_more": has_more,
+        "next_after_id": items[-1]["id"] if has_more else None
+    }
+
+def stream_file_logs(file_id: int, names: List[str], format: str):
+    """Yield a file's logs as NDJSON lines or CSV rows using a server-side cursor"""
+    # Runs while the body is sent, after the endpoint returned; holds the only session of the export
+    db = SessionLocal()
+    try:
+        query = (
+            db.query(*[LOG_FIELDS[name] for name in names])
+            .filter(models.Log.file_id == file_id)
+            .order_by(models.Log.id)
+            .yield_per(LOG_EXPORT_BATCH_SIZE)
+        )
+
+        if format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(names)
+            for i, row in enumerate(query, start=1):
+                writer.writerow([serialize_log_value(value) for value in row])
+                if i % LOG_EXPORT_BATCH_SIZE == 0:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue()
+        else:
+            for row in query:
+                record = {name: serialize_log_value(value) for name, value in zip(names, row)}
+                yield json.dumps(record, default=str) + "\n"
+    finally:
+        db.close()
+
+@router.get("/files/{file_id}/logs/export")
+def export_file_logs(
+    file_id: int,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated log columns to export"),
+    current_user: auth_models.User = Depends(get_current_user)
+):
+    """Stream every log of a file as NDJSON or CSV without loading them all in memory"""
+    names = resolve_log_fields(fields)
+    # Not a request-scoped session: yield dependencies are only closed after
+    # the stream ends, which would hold a second connection for the download
+    db = SessionLocal()
+    try:
+        file = get_file_or_404(db, file_id)
+    finally:
+        db.close()
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    export_name = f"{os.path.splitext(file.filename)[0]}_logs.{format}"
+    return StreamingResponse(
+        stream_file_logs(file_id, names, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{export_name}"'}
+    )
+
+@router.get("/logs/search")
+def search_logs(
+    ip_source: Optional[str] = Query(None, description="Source address or CIDR, e.g. 10.0.0.0/8"),
+    ip_destination: Optional[str] = Query(None, description="Destination address or CIDR"),
+    ip: Optional[str] = Query(None, description="Address or CIDR matched on either side"),
+    severity: Optional[List[str]] = Query(None),
+    action: Optional[List[str]] = Query(None),
+    attack_type: Optional[List[str]] = Query(None),
+    log_type: Optional[List[str]] = Query(None),
+    tool_id: Optional[int] = None,
+    file_id: Optional[int] = None,
+    start_date: Optional[datetime] = Query(None, description="Inclusive lower bound on event_time"),
+    end_date: Optional[datetime] = Query(None, description="Exclusive upper bound on event_time"),
+    before_id: Optional[int] = Query(None, ge=0, description="Return logs with an id lower than this cursor"),
+    limit: int = Query(100, ge=1, le=1000),
+    fields: Optional[str] = Query(None, description="Comma-separated log columns to return"),
+    db: Session = Depends(get_db),
+    current_user: auth_models.User = Depends(get_current_user)
+):
+    """Search logs by IP/CIDR, categorical fields and event time, newest first"""
+    names = resolve_log_fields(fields, default=SEARCH_LOG_FIELDS)
+    query = db.query(*[LOG_FIELDS[name] for name in names])
+
+    # <<= is "contained by or equal", served by the inet_ops GiST indexes
+    if ip_source:
+        network = parse_network(ip_source, "ip_source")
+        query = query.filter(models.Log.ip_source.op("<<=")(cast(str(network), INET)))
+    if ip_destination:
+        network = parse_network(ip_destination, "ip_destination")
+        query = query.filter(models.Log.ip_destination.op("<<=")(cast(str(network), INET)))
+    if ip:
+        network = cast(str(parse_network(ip, "ip")), INET)
+        query = query.filter(or_(
+            models.Log.ip_source.op("<<=")(network),
+            models.Log.ip_destination.op("<<=")(network)
+        ))
+
+    for column, values in (
+        (models.Log.severity, severity),
+        (models.Log.action, action),
+        (models.Log.attack_type, attack_type),
+        (models.Log.log_type, log_type),
+    ):
+        if values:
+            query = query.filter(column.in_(values))
+    if tool_id is not None:
+        query = query.filter(models.Log.tool_id == tool_id)
+    if file_id is not None:
+        query = query.filter(models.Log.file_id == file_id)
+    if start_date:
+        query = query.filter(models.Log.event_time >= start_date)
+    if end_date:
+        query = query.filter(models.Log.event_time < end_date)
+    if before_id is not None:
+        query = query.filter(models.Log.id < before_id)
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.order_by(models.Log.id.desc()).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    items = [
+        {name: serialize_log_value(value) for name, value in zip(names, row)}
+        for row in rows
+    ]
+    return {
+        "items": items,
+        "count": len(items),
+        "has_more": has_more,
+        "next_before_id": items[-1]["id"] if has_more else None
+    }
+
+@router.get("/logs/fulltext")
+def fulltext_search_logs(
+    q: str = Query(..., min_length=1, max_length=500, description="Web-style search: quoted phrases, OR, -exclusions"),
+    severity: Optional[List[str]] = Query(None),
+    tool_id: Optional[int] = None,
+    file_id: Optional[int] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
     db: Session = Depends(get_db),
     current_user: auth_models.User = Depends(get_current_user)
 ):
-    logs = db.query(models.Log).filter(models.Log.file_id == file_id).all()
-    return logs
+    """Ranked full-text search over vulnerability names, messages, details and solutions"""
+    tsquery = func.websearch_to_tsquery("english", q)
+    rank = func.ts_rank_cd(models.Log.search_vector, tsquery)
+
+    # Rank and paginate on the GIN index first; highlighting only runs on the page rows
+    page = db.query(models.Log.id.label("id"), rank.label("rank")).filter(
+        models.Log.search_vector.op("@@")(tsquery)
+    )
+    if severity:
+        page = page.filter(models.Log.severity.in_(severity))
+    if tool_id is not None:
+        page = page.filter(models.Log.tool_id == tool_id)
+    if file_id is not None:
+        page = page.filter(models.Log.file_id == file_id)
+    page = page.order_by(rank.desc(), models.Log.id.desc()).offset(skip).limit(limit + 1).subquery()
+
+    document = func.concat_ws(
+        " … ", models.Log.vulnerability_name, models.Log.message, models.Log.details, models.Log.solution
+    )
+    highlight = func.ts_headline(
+        "english", document, tsquery,
+        "StartSel=<mark>, StopSel=</mark>, MaxFragments=3, MaxWords=25, MinWords=8"
+    )
+    rows = db.query(
+        models.Log.id,
+        models.Log.file_id,
+        models.Log.tool_id,
+        models.Log.severity,
+        models.Log.vulnerability_name,
+        models.Log.event_time,
+        page.c.rank,
+        highlight.label("highlight")
+    ).join(page, page.c.id == models.Log.id).order_by(page.c.rank.desc(), models.Log.id.desc()).all()
+
+    has_more = len(rows) > limit
+    items = [
+        {
+            "id": row.id,
+            "file_id": row.file_id,
+            "tool_id": row.tool_id,
+            "severity": row.severity,
+            "vulnerability_name": row.vulnerability_name,
+            "event_time": row.event_time.isoformat() if row.event_time else None,
+            "rank": row.rank,
+            "highlight": row.highlight
+        }
+        for row in rows[:limit]
+    ]
+    return {
+        "query": q,
+        "items": items,
+        "count": len(items),
+        "has_more": has_more
+    }
 
 # ==================== KPI VALUES ====================
 
+def get_bucketed_kpi_values(
+    db: Session,
+    kpi_id: int,
+    bucket: str,
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    limit: int
+) -> list:
+    """Aggregate one KPI's values into time buckets (min/max/avg of numeric values, last raw value)"""
+    # Numeric KPIs are stored as {"value": <number>}
+    numeric_value = case(
+        (func.jsonb_typeof(models.KPIValue.value['value']) == 'number',
+         models.KPIValue.value['value'].astext.cast(Float))
+    )
+    time_bucket = func.time_bucket(cast(bucket, INTERVAL), models.KPIValue.timestamp).label("bucket")
+    
+    query = db.query(
+        time_bucket,
+        func.min(numeric_value),
+        func.max(numeric_value),
+        func.avg(numeric_value),
+        func.last(models.KPIValue.value, models.KPIValue.timestamp),
+        func.count(models.KPIValue.id)
+    ).filter(models.KPIValue.kpi_id == kpi_id)
+    
+    if start_date:
+        query = query.filter(models.KPIValue.timestamp >= start_date)
+    
+    if end_date:
+        query = query.filter(models.KPIValue.timestamp <= end_date)
+    
+    rows = query.group_by(time_bucket).order_by(time_bucket.desc()).limit(limit).all()
+    
+    return [
+        {
+            "kpi_id": kpi_id,
+            "timestamp": row[0].isoformat(),
+            "min": row[1],
+            "max": row[2],
+            "avg": row[3],
+            "last": row[4],
+            "count": row[5]
+        }
+        for row in rows
+    ]
+
 @router.get("/kpi-values")
-async def get_kpi_values(
+def get_kpi_values(
     kpi_id: Optional[int] = Query(None, description="Filter by KPI ID"),
     start_date: Optional[datetime] = Query(None, description="Start date for filtering"),
     end_date: Optional[datetime] = Query(None, description="End date for filtering"),
     limit: int = Query(100, le=1000),
+    bucket: Optional[str] = Query(None, description="Aggregate a single KPI into time buckets, e.g. '1 hour', '1 day'"),
     db: Session = Depends(get_db),
     current_user: auth_models.User = Depends(get_current_user)
 ):
     """Get KPI values with filtering options"""
     
+    if bucket:
+        if not kpi_id:
+            raise HTTPException(status_code=400, detail="kpi_id is required when bucket is set")
+        if not is_valid_bucket(bucket):
+            raise HTTPException(status_code=400, detail="Bucket must look like '<n> minute|hour|day|week|month' with n >= 1")
+        return get_bucketed_kpi_values(db, kpi_id, bucket, start_date, end_date, limit)
+    
     query = db.query(models.KPIValue).join(models.KPI)
     
     if kpi_id:
@@ -674,7 +1127,7 @@ async def get_kpi_values(
     return result
 
 @router.get("/kpi-values/{kpi_id}/latest")
-async def get_latest_kpi_value(
+def get_latest_kpi_value(
     kpi_id: int,
     db: Session = Depends(get_db),
     current_user: auth_models.User = Depends(get_current_user)
@@ -1,7 +1,7 @@
-from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from ..core.config import settings
+from ..core.db_pool import build_engine
 import logging
 import time
 from sqlalchemy.exc import OperationalError
@@ -11,11 +11,12 @@ logger = logging.getLogger(__name__)
 
 SQLALCHEMY_DATABASE_URL = f"postgresql://{settings.DASHBOARD_POSTGRES_USER}:{settings.DASHBOARD_POSTGRES_PASSWORD}@{settings.DASHBOARD_POSTGRES_HOST}:{settings.DASHBOARD_POSTGRES_PORT}/{settings.DASHBOARD_POSTGRES_DB}"
 
+engine = build_engine(SQLALCHEMY_DATABASE_URL, "dashboard")
+
 def wait_for_db(max_retries=30, retry_interval=2):
     """Attendre que la base de données soit disponible"""
     for attempt in range(max_retries):
         try:
-            engine = create_engine(SQLALCHEMY_DATABASE_URL)
             connection = engine.connect()
             connection.close()
             logger.info("✅ Base de données connectée avec succès!")
@@ -28,7 +29,6 @@ def wait_for_db(max_retries=30, retry_interval=2):
                 logger.error("❌ Impossible de se connecter à la base de données après toutes les tentatives")
                 raise
     
-engine = wait_for_db()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
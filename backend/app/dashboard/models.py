@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Float, Integer, String, ForeignKey, DateTime
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import Column, Computed, Date, Float, Index, Integer, String, Text, ForeignKey, DateTime
+from sqlalchemy.dialects.postgresql import INET, JSONB, TSVECTOR
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -37,6 +37,20 @@ class KPIValue(Base):
 
 KPI.values = relationship("KPIValue", order_by=KPIValue.timestamp, back_populates="kpi")
 
+class KPILatest(Base):
+    """Current and previous value per KPI, kept in sync by the kpi_values_sync_latest trigger"""
+    __tablename__ = "kpi_latest"
+
+    kpi_id = Column(Integer, ForeignKey("kpis.id", ondelete="CASCADE"), primary_key=True)
+    current_value = Column(JSONB, nullable=False)
+    current_calculated_at = Column(DateTime(timezone=True), nullable=False)
+    previous_value = Column(JSONB, nullable=True)
+    previous_calculated_at = Column(DateTime(timezone=True), nullable=True)
+
+    kpi = relationship("KPI", back_populates="latest")
+
+KPI.latest = relationship("KPILatest", uselist=False, back_populates="kpi", passive_deletes=True)
+
 class Tool(Base):
     __tablename__ = "tools"
 
@@ -68,6 +82,13 @@ class File(Base):
     # Relationships
     logs = relationship("Log", back_populates="file")
 
+LOG_SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(vulnerability_name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(message, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(details, '')), 'C') || "
+    "setweight(to_tsvector('english', coalesce(solution, '')), 'D')"
+)
+
 class Log(Base):
     __tablename__ = "logs"
 
@@ -76,16 +97,17 @@ class Log(Base):
     tool_id = Column(Integer, ForeignKey("tools.id"), nullable=False)
     status = Column(String, nullable=False)  # success, failed
     message = Column(String, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     raw_data = Column(String, nullable=True)  # Store raw data from the tool
     parsed_data = Column(String, nullable=True)  # Store JSON results
-    event_time = Column(DateTime(timezone=True), nullable=True)
+    event_time = Column(DateTime(timezone=True), nullable=True, index=True)
     action = Column(String, nullable=True)
     attack_type = Column(String, nullable=True)
     policy = Column(String, nullable=True)
     bandwidth = Column(Float, nullable=True)  # e.g., in Mbps
-    ip_source = Column(String, nullable=True)  # Source IP address
-    ip_destination = Column(String, nullable=True)  # Destination IP address
+    ip_source = Column(INET, nullable=True)  # Source IP address
+    host = Column(String, nullable=True)  # Source host name when the report gives no address
+    ip_destination = Column(INET, nullable=True)  # Destination IP address
     severity = Column(String, nullable=True)  # e.g., low, medium, high
     cvss_base_score = Column(Float, nullable=True)  # Common Vulnerability Scoring System score
     vulnerability_name = Column(String, nullable=True)  # Name of the vulnerability
@@ -94,7 +116,50 @@ class Log(Base):
     log_type = Column(String, nullable=True)
     app_name = Column(String, nullable=True) 
     country_code = Column(String, nullable=True)
+    details = Column(Text, nullable=True)  # Vulnerability description / plugin output
+    solution = Column(Text, nullable=True)  # Remediation advice
+    # Weighted full-text document maintained by Postgres on every insert/update
+    search_vector = Column(TSVECTOR, Computed(LOG_SEARCH_VECTOR_SQL, persisted=True))
 
     # Relationships
     file = relationship("File", back_populates="logs")
-    tool = relationship("Tool", backref="logs")
\ No newline at end of file
+    tool = relationship("Tool", backref="logs")
+
+    __table_args__ = (
+        # GiST with inet_ops serves CIDR containment (<<=) and equality lookups
+        Index("ix_logs_ip_source", "ip_source", postgresql_using="gist", postgresql_ops={"ip_source": "inet_ops"}),
+        Index("ix_logs_ip_destination", "ip_destination", postgresql_using="gist", postgresql_ops={"ip_destination": "inet_ops"}),
+        Index("ix_logs_severity_event_time", "severity", "event_time"),
+        Index("ix_logs_action_event_time", "action", "event_time"),
+        Index("ix_logs_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
+class IncidentReportHistory(Base):
+    """ciso_incident_report rows upserted by date from /inwi2/history uploads (hypertable on date)"""
+    __tablename__ = "inwi_incident_report_history"
+
+    date = Column(Date, primary_key=True)
+    incidents_critical = Column(Integer)
+    incidents_high = Column(Integer)
+    incidents_medium = Column(Integer)
+    incidents_low = Column(Integer)
+    sla_compliance_rate = Column(Float)
+    mttr_hours = Column(Float)
+    mttd_hours = Column(Float)
+    mttc_hours = Column(Float)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class VulnerabilityReportHistory(Base):
+    """ciso_vulnerability_report rows upserted by date from /inwi2/history uploads (hypertable on date)"""
+    __tablename__ = "inwi_vulnerability_report_history"
+
+    date = Column(Date, primary_key=True)
+    total_active_vulnerabilities = Column(Integer)
+    new_vulnerabilities = Column(Integer)
+    resolved_vulnerabilities = Column(Integer)
+    critical_vulns = Column(Integer)
+    high_vulns = Column(Integer)
+    medium_vulns = Column(Integer)
+    low_vulns = Column(Integer)
+    avg_patching_time_days = Column(Float)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
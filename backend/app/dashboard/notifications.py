@@ -0,0 +1,234 @@
+import asyncio
+import logging
+from typing import Callable, Dict, Hashable, Optional, Set
+
+import psycopg2
+import psycopg2.extensions
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..core.config import settings
+from ..init_db.create_triggers import CACHE_INVALIDATION_CHANNEL, KPI_VALUES_CHANNEL
+from .cache import invalidate_kpi_dashboard, stats_cache
+from .database import SessionLocal, engine
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_DELAY_SECONDS = 5
+
+# Handlers for "<kind>:<key>" messages on CACHE_INVALIDATION_CHANNEL, by kind
+_invalidation_handlers: Dict[str, Callable[[str], None]] = {}
+
+def on_invalidation(kind: str, handler: Callable[[str], None]):
+    """Run handler(key) in this worker whenever any worker publishes an invalidation of `kind`"""
+    _invalidation_handlers[kind] = handler
+
+def publish_invalidation(kind: str, key: str):
+    """
+    Ask every worker, through the KPI listener connection, to drop cached state
+
+    Blocking; call after the change is committed. If the message cannot be sent
+    or a worker's listener is reconnecting, that worker's copy is only dropped
+    when its TTL expires, so cache TTLs bound how stale it can get.
+    """
+    try:
+        with engine.begin() as conn:
+            conn.execute(
+                text("SELECT pg_notify(:channel, :message)"),
+                {"channel": CACHE_INVALIDATION_CHANNEL, "message": f"{kind}:{key}"}
+            )
+    except SQLAlchemyError as e:
+        logger.warning(f"Could not publish {kind} invalidation to other workers: {e}")
+
+def dispatch_invalidation(message: str):
+    kind, _, key = message.partition(":")
+    handler = _invalidation_handlers.get(kind)
+    if handler is None:
+        logger.warning(f"Ignoring cache invalidation of unknown kind '{kind}'")
+        return
+    try:
+        handler(key)
+    except Exception as e:
+        logger.error(f"Cache invalidation '{message}' failed: {e}")
+
+def diff_kpi_payloads(previous: Optional[dict], current: dict) -> dict:
+    """KPIs added or changed since the previous payload, keyed by title, plus removed titles"""
+    before = {kpi["title"]: kpi for kpi in (previous or {}).get("kpis", [])}
+    after = {kpi["title"]: kpi for kpi in current["kpis"]}
+    return {
+        "changed": [kpi for title, kpi in after.items() if before.get(title) != kpi],
+        "removed": [title for title in before if title not in after],
+        "last_updated": current["last_updated"],
+    }
+
+class KPIUpdateBroadcaster:
+    """
+    Pushes KPI dashboard diffs to connected clients
+
+    A dedicated psycopg2 connection LISTENs on the kpi_values trigger channel
+    and is watched by the event loop; each notification rebuilds the payload
+    once per subscribed role level and fans the diff out to subscriber queues.
+    The same connection carries cross-worker cache invalidations.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[Hashable, Set[asyncio.Queue]] = {}
+        self._snapshots: Dict[Hashable, dict] = {}
+        self._build_payload: Optional[Callable] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._conn = None
+        self._connect_task: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._pending = False
+        self._stopped = False
+
+    async def start(self, build_payload: Callable):
+        """Start listening; build_payload(db, level) returns the dashboard payload for a level"""
+        self._build_payload = build_payload
+        self._loop = asyncio.get_running_loop()
+        self._stopped = False
+        self._schedule_connect(delay=0)
+
+    async def stop(self):
+        self._stopped = True
+        if self._connect_task:
+            self._connect_task.cancel()
+        self._disconnect()
+        if self._refresh_task:
+            self._refresh_task.cancel()
+
+    def subscribe(self, level: Hashable, snapshot: dict) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=settings.KPI_STREAM_QUEUE_SIZE)
+        self._subscribers.setdefault(level, set()).add(queue)
+        self._snapshots.setdefault(level, snapshot)
+        return queue
+
+    def unsubscribe(self, level: Hashable, queue: asyncio.Queue):
+        queues = self._subscribers.get(level)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[level]
+            self._snapshots.pop(level, None)
+
+    @staticmethod
+    def _open_connection():
+        conn = psycopg2.connect(
+            dbname=settings.DASHBOARD_POSTGRES_DB,
+            user=settings.DASHBOARD_POSTGRES_USER,
+            password=settings.DASHBOARD_POSTGRES_PASSWORD,
+            host=settings.DASHBOARD_POSTGRES_HOST,
+            port=settings.DASHBOARD_POSTGRES_PORT
+        )
+        try:
+            conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {KPI_VALUES_CHANNEL}; LISTEN {CACHE_INVALIDATION_CHANNEL};")
+        except psycopg2.Error:
+            conn.close()
+            raise
+        return conn
+
+    async def _connect(self, delay: float):
+        """Open the LISTEN connection in a thread, so a slow or unreachable database never blocks the loop"""
+        while not self._stopped:
+            await asyncio.sleep(delay)
+            try:
+                conn = await self._loop.run_in_executor(None, self._open_connection)
+            except psycopg2.Error as e:
+                logger.warning(f"KPI update listener unavailable, retrying in {RECONNECT_DELAY_SECONDS}s: {e}")
+                delay = RECONNECT_DELAY_SECONDS
+                continue
+            if self._stopped:
+                conn.close()
+                return
+            self._conn = conn
+            self._loop.add_reader(conn.fileno(), self._on_readable)
+            logger.info(f"Listening for KPI updates on '{KPI_VALUES_CHANNEL}'")
+            return
+
+    def _schedule_connect(self, delay: float):
+        if self._stopped or (self._connect_task and not self._connect_task.done()):
+            return
+        self._connect_task = self._loop.create_task(self._connect(delay))
+
+    def _disconnect(self):
+        if self._conn is None:
+            return
+        try:
+            self._loop.remove_reader(self._conn.fileno())
+        except Exception:
+            pass
+        try:
+            self._conn.close()
+        except Exception:
+            pass
+        self._conn = None
+
+    def _on_readable(self):
+        try:
+            self._conn.poll()
+        except psycopg2.Error as e:
+            logger.warning(f"KPI update listener lost its connection: {e}")
+            self._disconnect()
+            self._schedule_connect(delay=RECONNECT_DELAY_SECONDS)
+            return
+
+        if not self._conn.notifies:
+            return
+        notifies = list(self._conn.notifies)
+        self._conn.notifies.clear()
+
+        kpis_changed = False
+        for notify in notifies:
+            if notify.channel == CACHE_INVALIDATION_CHANNEL:
+                dispatch_invalidation(notify.payload)
+            else:
+                kpis_changed = True
+        if not kpis_changed:
+            return
+
+        invalidate_kpi_dashboard()
+        stats_cache.clear()
+
+        # Coalesce notifications that arrive while a refresh is running
+        if self._refresh_task and not self._refresh_task.done():
+            self._pending = True
+        else:
+            self._refresh_task = self._loop.create_task(self._refresh())
+
+    async def _refresh(self):
+        while True:
+            self._pending = False
+            for level in list(self._subscribers):
+                try:
+                    payload = await self._loop.run_in_executor(None, self._build, level)
+                except Exception as e:
+                    logger.error(f"Failed to rebuild KPI payload for level {level}: {e}")
+                    continue
+                diff = diff_kpi_payloads(self._snapshots.get(level), payload)
+                self._snapshots[level] = payload
+                if diff["changed"] or diff["removed"]:
+                    self._publish(level, {"event": "diff", "data": diff}, payload)
+            if not self._pending:
+                return
+
+    def _build(self, level: Hashable) -> dict:
+        db = SessionLocal()
+        try:
+            return self._build_payload(db, level)
+        finally:
+            db.close()
+
+    def _publish(self, level: Hashable, message: dict, payload: dict):
+        for queue in list(self._subscribers.get(level, ())):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # A slow client missed diffs; replace its backlog with a full snapshot
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"event": "snapshot", "data": payload})
+
+kpi_broadcaster = KPIUpdateBroadcaster()
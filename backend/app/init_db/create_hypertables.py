@@ -0,0 +1,67 @@
+import psycopg2
+from ..core.config import settings
+
+def create_hypertables():
+    # Hypertables need the time column in every unique index, so kpi_values'
+    # primary key is widened to (id, timestamp) before conversion
+    kpi_values_statements = [
+        "ALTER TABLE kpi_values ALTER COLUMN timestamp SET NOT NULL;",
+        "ALTER TABLE kpi_values DROP CONSTRAINT IF EXISTS kpi_values_pkey;",
+        "ALTER TABLE kpi_values ADD PRIMARY KEY (id, timestamp);",
+        """
+        SELECT create_hypertable(
+            'kpi_values', 'timestamp',
+            chunk_time_interval => INTERVAL '30 days',
+            migrate_data => true,
+            if_not_exists => true
+        );
+        """,
+    ]
+
+    # inwi report history is keyed by date alone, so it converts as-is
+    history_tables = ["inwi_incident_report_history", "inwi_vulnerability_report_history"]
+
+    # Connect to the database
+    conn = psycopg2.connect(
+        dbname=settings.DASHBOARD_POSTGRES_DB,
+        user=settings.DASHBOARD_POSTGRES_USER,
+        password=settings.DASHBOARD_POSTGRES_PASSWORD,
+        host=settings.DASHBOARD_POSTGRES_HOST,
+        port=settings.DASHBOARD_POSTGRES_PORT
+    )
+    conn.autocommit = True
+    cur = conn.cursor()
+
+    try:
+        try:
+            cur.execute("CREATE EXTENSION IF NOT EXISTS timescaledb;")
+        except psycopg2.Error as e:
+            print(f"TimescaleDB not available, time-series tables stay plain tables: {e}")
+            return
+
+        cur.execute(
+            "SELECT 1 FROM timescaledb_information.hypertables WHERE hypertable_name = 'kpi_values';"
+        )
+        if cur.fetchone() is None:
+            # Sent as one query string so Postgres runs it as a single transaction
+            cur.execute("\n".join(kpi_values_statements))
+            print("kpi_values converted to a hypertable.")
+
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS ix_kpi_values_kpi_id_timestamp ON kpi_values (kpi_id, timestamp DESC);"
+        )
+
+        for table in history_tables:
+            cur.execute(
+                f"""
+                SELECT create_hypertable(
+                    '{table}', 'date',
+                    chunk_time_interval => INTERVAL '1 year',
+                    migrate_data => true,
+                    if_not_exists => true
+                );
+                """
+            )
+    finally:
+        cur.close()
+        conn.close()
@@ -0,0 +1,91 @@
+import psycopg2
+from ..core.config import settings
+from ..dashboard.models import LOG_SEARCH_VECTOR_SQL
+
+def create_indexes():
+    # create_all() only builds indexes for new tables, so columns and indexes
+    # changed on existing models are migrated here as well
+    convert_ip_columns = [
+        # Values that are not valid addresses become NULL instead of failing the cast
+        """
+        CREATE OR REPLACE FUNCTION public.safe_inet(value text)
+        RETURNS inet
+        LANGUAGE plpgsql
+        IMMUTABLE
+        AS $$
+        BEGIN
+            RETURN value::inet;
+        EXCEPTION WHEN others THEN
+            RETURN NULL;
+        END;
+        $$;
+        """,
+        # Host names stored as ip_source (Nessus hosts without a host-ip tag) move to logs.host
+        """
+        UPDATE logs SET host = ip_source
+        WHERE host IS NULL AND ip_source IS NOT NULL AND public.safe_inet(ip_source) IS NULL;
+        """,
+        # There is nowhere to keep other destinations, so refuse rather than drop them
+        """
+        DO $$
+        BEGIN
+            IF EXISTS (
+                SELECT 1 FROM logs
+                WHERE ip_destination IS NOT NULL AND public.safe_inet(ip_destination) IS NULL
+            ) THEN
+                RAISE EXCEPTION 'logs.ip_destination holds values that are not IP addresses; fix them before converting to inet';
+            END IF;
+        END;
+        $$;
+        """,
+        "ALTER TABLE logs ALTER COLUMN ip_source TYPE inet USING public.safe_inet(ip_source);",
+        "ALTER TABLE logs ALTER COLUMN ip_destination TYPE inet USING public.safe_inet(ip_destination);",
+    ]
+    add_columns = [
+        "ALTER TABLE logs ADD COLUMN IF NOT EXISTS host text;",
+        "ALTER TABLE logs ADD COLUMN IF NOT EXISTS details text;",
+        "ALTER TABLE logs ADD COLUMN IF NOT EXISTS solution text;",
+        f"ALTER TABLE logs ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ({LOG_SEARCH_VECTOR_SQL}) STORED;",
+    ]
+    indexes = [
+        "CREATE INDEX IF NOT EXISTS ix_logs_created_at ON logs (created_at);",
+        "CREATE INDEX IF NOT EXISTS ix_logs_event_time ON logs (event_time);",
+        "CREATE INDEX IF NOT EXISTS ix_logs_ip_source ON logs USING gist (ip_source inet_ops);",
+        "CREATE INDEX IF NOT EXISTS ix_logs_ip_destination ON logs USING gist (ip_destination inet_ops);",
+        "CREATE INDEX IF NOT EXISTS ix_logs_severity_event_time ON logs (severity, event_time);",
+        "CREATE INDEX IF NOT EXISTS ix_logs_action_event_time ON logs (action, event_time);",
+        "CREATE INDEX IF NOT EXISTS ix_logs_search_vector ON logs USING gin (search_vector);",
+    ]
+
+    # Connect to the database
+    conn = psycopg2.connect(
+        dbname=settings.DASHBOARD_POSTGRES_DB,
+        user=settings.DASHBOARD_POSTGRES_USER,
+        password=settings.DASHBOARD_POSTGRES_PASSWORD,
+        host=settings.DASHBOARD_POSTGRES_HOST,
+        port=settings.DASHBOARD_POSTGRES_PORT
+    )
+    conn.autocommit = True
+    cur = conn.cursor()
+
+    try:
+        # Added first: the inet conversion fills logs.host
+        cur.execute("\n".join(add_columns))
+
+        cur.execute(
+            "SELECT data_type FROM information_schema.columns "
+            "WHERE table_name = 'logs' AND column_name = 'ip_source';"
+        )
+        row = cur.fetchone()
+        if row and row[0] != "inet":
+            # Sent as one query string so Postgres runs it as a single transaction
+            cur.execute("\n".join(convert_ip_columns))
+            print("logs IP columns converted to inet.")
+
+        for statement in indexes:
+            cur.execute(statement)
+        # Refresh planner statistics used for approximate row counts
+        cur.execute("ANALYZE logs;")
+    finally:
+        cur.close()
+        conn.close()
@@ -0,0 +1,83 @@
+import psycopg2
+from ..core.config import settings
+
+KPI_VALUES_CHANNEL = "kpi_values_changed"
+# Sent by the app itself (see dashboard.notifications.publish_invalidation) so
+# every worker drops cached state that another worker just changed
+CACHE_INVALIDATION_CHANNEL = "cache_invalidated"
+
+def create_triggers():
+    # Statement-level so a batch insert of KPI values sends a single
+    # notification, delivered when the inserting transaction commits
+    trigger_statements = [
+        f"""
+        CREATE OR REPLACE FUNCTION public.notify_kpi_values_changed()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            PERFORM pg_notify('{KPI_VALUES_CHANNEL}', '');
+            RETURN NULL;
+        END;
+        $$;
+        """,
+        "DROP TRIGGER IF EXISTS kpi_values_notify ON kpi_values;",
+        """
+        CREATE TRIGGER kpi_values_notify
+        AFTER INSERT ON kpi_values
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION public.notify_kpi_values_changed();
+        """,
+        # KPI definitions are part of the dashboard payload as well
+        "DROP TRIGGER IF EXISTS kpis_notify ON kpis;",
+        """
+        CREATE TRIGGER kpis_notify
+        AFTER INSERT OR UPDATE OR DELETE ON kpis
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION public.notify_kpi_values_changed();
+        """,
+        # Every kpi_values insert rolls kpi_latest forward, whichever service
+        # wrote it; older timestamps than the current value leave it untouched
+        """
+        CREATE OR REPLACE FUNCTION public.sync_kpi_latest()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            INSERT INTO kpi_latest (kpi_id, current_value, current_calculated_at)
+            VALUES (NEW.kpi_id, NEW.value, NEW.timestamp)
+            ON CONFLICT (kpi_id) DO UPDATE SET
+                previous_value = kpi_latest.current_value,
+                previous_calculated_at = kpi_latest.current_calculated_at,
+                current_value = EXCLUDED.current_value,
+                current_calculated_at = EXCLUDED.current_calculated_at
+            WHERE kpi_latest.current_calculated_at <= EXCLUDED.current_calculated_at;
+            RETURN NULL;
+        END;
+        $$;
+        """,
+        "DROP TRIGGER IF EXISTS kpi_values_sync_latest ON kpi_values;",
+        """
+        CREATE TRIGGER kpi_values_sync_latest
+        AFTER INSERT ON kpi_values
+        FOR EACH ROW
+        EXECUTE FUNCTION public.sync_kpi_latest();
+        """,
+    ]
+
+    # Connect to the database
+    conn = psycopg2.connect(
+        dbname=settings.DASHBOARD_POSTGRES_DB,
+        user=settings.DASHBOARD_POSTGRES_USER,
+        password=settings.DASHBOARD_POSTGRES_PASSWORD,
+        host=settings.DASHBOARD_POSTGRES_HOST,
+        port=settings.DASHBOARD_POSTGRES_PORT
+    )
+    conn.autocommit = True
+    cur = conn.cursor()
+
+    try:
+        cur.execute("\n".join(trigger_statements))
+    finally:
+        cur.close()
+        conn.close()
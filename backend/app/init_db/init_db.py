@@ -1,4 +1,5 @@
 
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from app.auth import models as AuthModels
 from app.dashboard import models as DashboardModels
@@ -103,13 +104,22 @@ def seed_data():
     finally:
         auth_db.close()
 
+    # Bound before the DDL below so a failure there reaches the handlers intact
+    dashboard_db : Session = Dashboard_Session()
     try :
         # seed default rpc functions
         from app.init_db.create_rpc import create_rpc_functions
         create_rpc_functions()
         print("RPC functions created")
 
-        dashboard_db : Session = Dashboard_Session()
+        from app.init_db.create_hypertables import create_hypertables
+        create_hypertables()
+
+        from app.init_db.create_indexes import create_indexes
+        create_indexes()
+
+        from app.init_db.create_triggers import create_triggers
+        create_triggers()
 
         # Seed default KPIs
         if dashboard_db.query(DashboardModels.KPI).count() == 0:
@@ -468,6 +478,27 @@ def seed_data():
             dashboard_db.commit()
             print("Tools seeded")
 
+        # Backfill kpi_latest for KPIs that only have history in kpi_values
+        backfilled = dashboard_db.execute(text("""
+            INSERT INTO kpi_latest (kpi_id, current_value, current_calculated_at, previous_value, previous_calculated_at)
+            SELECT kpi_id,
+                   MAX(value::text) FILTER (WHERE rn = 1)::jsonb,
+                   MAX(timestamp) FILTER (WHERE rn = 1),
+                   MAX(value::text) FILTER (WHERE rn = 2)::jsonb,
+                   MAX(timestamp) FILTER (WHERE rn = 2)
+            FROM (
+                SELECT kv.kpi_id, kv.value, kv.timestamp,
+                       ROW_NUMBER() OVER (PARTITION BY kv.kpi_id ORDER BY kv.timestamp DESC) AS rn
+                FROM kpi_values kv
+                WHERE NOT EXISTS (SELECT 1 FROM kpi_latest kl WHERE kl.kpi_id = kv.kpi_id)
+            ) ranked
+            WHERE rn <= 2
+            GROUP BY kpi_id
+        """)).rowcount
+        dashboard_db.commit()
+        if backfilled:
+            print(f"kpi_latest backfilled for {backfilled} KPIs")
+
     except Exception as e:
         print(f"Error seeding data in dashboard db : {e}")
         dashboard_db.rollback()
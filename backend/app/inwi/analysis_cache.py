@@ -0,0 +1,191 @@
+import codecs
+import hashlib
+import importlib
+import json
+import logging
+import os
+import tempfile
+from typing import Any, BinaryIO, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+
+from ..core.cache import TTLCache
+from ..core.config import settings
+from ..core.workers import ProcessWorkerPool
+from .csv_schemas import iter_report_csv, load_report_csv
+
+logger = logging.getLogger(__name__)
+
+# Read size used when hashing and copying streamed uploads
+STREAM_BLOCK_BYTES = 1024 * 1024
+
+# Analysis results keyed by (content sha256, router, report_type, analyzer version),
+# stored as (result, rows_processed)
+analysis_cache = TTLCache(
+    maxsize=settings.INWI_ANALYSIS_CACHE_SIZE,
+    ttl=settings.INWI_ANALYSIS_CACHE_TTL_SECONDS,
+)
+
+# Parsing and analysis run in worker processes so large uploads never block the event loop
+analysis_workers = ProcessWorkerPool(
+    "inwi-analysis",
+    workers=settings.INWI_ANALYSIS_WORKERS,
+    queue_size=settings.INWI_ANALYSIS_QUEUE_SIZE,
+    timeout=settings.INWI_ANALYSIS_TIMEOUT_SECONDS,
+)
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (pd.Timestamp, pd.Timedelta)):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _disk_path(key: tuple) -> Optional[str]:
+    if not settings.INWI_ANALYSIS_CACHE_DIR:
+        return None
+    name = hashlib.sha256("|".join(map(str, key)).encode()).hexdigest()
+    return os.path.join(settings.INWI_ANALYSIS_CACHE_DIR, f"{name}.json")
+
+def _read_disk(key: tuple) -> Optional[Tuple[Any, int]]:
+    path = _disk_path(key)
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+        return entry["data"], entry["rows_processed"]
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Ignoring unreadable analysis cache file {path}: {e}")
+        return None
+
+def _write_disk(key: tuple, result: Any, rows: int):
+    path = _disk_path(key)
+    if not path:
+        return
+    # Write then rename so concurrent readers never see a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"data": result, "rows_processed": rows}, f, default=_json_default)
+        os.replace(tmp_path, path)
+    except (OSError, TypeError, ValueError) as e:
+        # Results that are not JSON serializable stay memory-only
+        logger.warning(f"Could not write analysis cache file {path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+async def _lookup(key: tuple) -> Optional[Tuple[Any, int, str]]:
+    cached = analysis_cache.get(key)
+    if cached is not None:
+        return cached[0], cached[1], "memory"
+
+    # Reading and decoding a large result would block the event loop
+    cached = await run_in_threadpool(_read_disk, key)
+    if cached is not None:
+        analysis_cache.set(key, cached)
+        return cached[0], cached[1], "disk"
+    return None
+
+async def _store(key: tuple, result: Any, rows: int):
+    analysis_cache.set(key, (result, rows))
+    await run_in_threadpool(_write_disk, key, result, rows)
+
+def _get_analyzer(router: str):
+    # Router modules are imported lazily so worker processes only load what they run
+    return importlib.import_module(f"app.inwi.{router}").analyzer
+
+def run_analysis(content: bytes, router: str, report_type: str) -> Tuple[Any, int]:
+    """Worker process entry point: parse and analyze an in-memory upload"""
+    df = load_report_csv(content, router, report_type)
+    if df.empty:
+        return None, 0
+    return _get_analyzer(router).report_types[report_type](df), len(df)
+
+def run_chunked_analysis(path: str, router: str, report_type: str, encoding: str) -> Tuple[Any, int]:
+    """Worker process entry point: analyze a spooled upload chunk by chunk"""
+    rows = 0
+
+    def counted(chunks: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        nonlocal rows
+        for chunk in chunks:
+            rows += len(chunk)
+            yield chunk
+
+    with open(path, "rb") as f:
+        chunks = iter_report_csv(f, router, report_type, encoding, settings.INWI_CSV_CHUNK_ROWS)
+        result = _get_analyzer(router).report_types[report_type](counted(chunks))
+    return result, rows
+
+async def analyze_upload(content: bytes, router: str, report_type: str, analyzer,
+                         request: Optional[Request] = None) -> Tuple[Any, int, str]:
+    """
+    Analyze an uploaded report, reusing earlier results for identical content
+
+    Returns (result, rows_processed, cache) where cache is "memory", "disk" or "miss".
+    Hits skip CSV parsing and analysis entirely; misses run on the analysis
+    worker pool and are cancelled if the request disconnects.
+    """
+    digest = await run_in_threadpool(lambda: hashlib.sha256(content).hexdigest())
+    key = (digest, router, report_type, analyzer.version)
+    cached = await _lookup(key)
+    if cached is not None:
+        return cached
+
+    result, rows = await analysis_workers.run(run_analysis, content, router, report_type, request=request)
+    if rows == 0:
+        raise HTTPException(status_code=400, detail="CSV file is empty")
+
+    await _store(key, result, rows)
+    return result, rows, "miss"
+
+def _scan(fileobj: BinaryIO, copy_to: BinaryIO) -> Tuple[str, str]:
+    """Copy a file block by block, returning its sha256 and encoding (utf-8 or latin-1)"""
+    digest = hashlib.sha256()
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    encoding = "utf-8"
+    fileobj.seek(0)
+    for block in iter(lambda: fileobj.read(STREAM_BLOCK_BYTES), b""):
+        digest.update(block)
+        copy_to.write(block)
+        if encoding == "utf-8":
+            try:
+                decoder.decode(block)
+            except UnicodeDecodeError:
+                encoding = "latin-1"
+    return digest.hexdigest(), encoding
+
+async def analyze_upload_stream(fileobj: BinaryIO, router: str, report_type: str, analyzer,
+                                request: Optional[Request] = None) -> Tuple[Any, int, str]:
+    """
+    Like analyze_upload, for files too large to load at once
+
+    The report type must be in analyzer.chunked_report_types: its analyzer is
+    fed CSV chunks, so memory stays bounded whatever the file size. The upload
+    is copied to a named temporary file the worker process can open.
+    """
+    with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as spooled:
+        path = spooled.name
+        digest, encoding = await run_in_threadpool(_scan, fileobj, spooled)
+    try:
+        key = (digest, router, report_type, analyzer.version)
+        cached = await _lookup(key)
+        if cached is not None:
+            return cached
+
+        result, rows = await analysis_workers.run(
+            run_chunked_analysis, path, router, report_type, encoding, request=request
+        )
+        if rows == 0:
+            raise HTTPException(status_code=400, detail="CSV file is empty")
+
+        await _store(key, result, rows)
+        return result, rows, "miss"
+    finally:
+        await run_in_threadpool(os.remove, path)
@@ -0,0 +1,180 @@
+import asyncio
+import io
+import logging
+import os
+import zipfile
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request, UploadFile
+
+from ..core.config import settings
+from .analysis_cache import analysis_workers, analyze_upload
+from .csv_schemas import REPORT_SCHEMAS, read_header
+
+logger = logging.getLogger(__name__)
+
+# Export file names that differ from the report type they hold
+FILENAME_REPORT_TYPES: Dict[str, Dict[str, str]] = {
+    "inwi2": {},
+    "inwi3": {
+        "comex_posture_risque_cyber": "strategic_risk_posture",
+        "comex_impact_financier_cout_incidents": "financial_impact_costs",
+        "comex_financial_impact": "financial_impact_avoided",
+        "comex_conformite_reglementaire": "regulatory_compliance",
+        "comex_regulatory_compliance": "regulatory_compliance",
+        "comex_security_program_maturity": "security_program",
+        "comex_incident_resolution": "incident_resolution",
+        "comex_sector_benchmarking": "benchmark_sector",
+        "comex_threat_landscape": "threat_landscape",
+        "comex_risk_exposure": "exposure_risk",
+        "comex_strategic_alignment": "strategic_alignment",
+    },
+}
+
+# Columns that identify a report type when its file name does not
+HEADER_SIGNATURES: Dict[str, Dict[str, set]] = {
+    "inwi2": {
+        report_type: set(schema["usecols"]) - {"date"}
+        for report_type, schema in REPORT_SCHEMAS["inwi2"].items()
+    },
+    "inwi3": {
+        "strategic_risk_posture": {"score_risk", "asset_criticality", "vuln_severity", "patch_status"},
+        "financial_impact_costs": {"total_cost", "cost_per_hour", "duration_hours", "business_unit"},
+        "financial_impact_avoided": {"loss_expected", "loss_avoided", "losses_avoided", "roi_percentage"},
+        "regulatory_compliance": {"regulation", "framework", "compliance_score", "control_id", "non_conformities"},
+        "security_program": {"maturity_score", "current_maturity", "target_maturity", "investment_required"},
+        "incident_resolution": {"detection_time_hours", "resolution_time_hours", "detected_at", "resolved_at"},
+        "benchmark_sector": {"score_global", "sector_average", "our_score", "sector_best"},
+        "threat_landscape": {"threat_type", "count_incidents", "sector_targeting", "our_exposure"},
+        "exposure_risk": {"probability_percent", "impact_value", "exposure_amount", "exposed_assets", "asset_category"},
+        "strategic_alignment": {"progress_percent", "security_coverage_percent", "initiative_name", "business_objective"},
+    },
+}
+
+def match_report_type(router: str, filename: str, content: bytes, analyzer) -> Optional[str]:
+    """Report type of a batch file: from its name first, then from its header row"""
+    stem = os.path.splitext(os.path.basename(filename))[0].lower()
+    if stem in analyzer.report_types:
+        return stem
+    if stem in FILENAME_REPORT_TYPES.get(router, {}):
+        return FILENAME_REPORT_TYPES[router][stem]
+
+    header = set(read_header(content))
+    scores = {
+        report_type: len(signature & header)
+        for report_type, signature in HEADER_SIGNATURES.get(router, {}).items()
+    }
+    best = max(scores.values(), default=0)
+    if best == 0:
+        return None
+    candidates = [report_type for report_type, score in scores.items() if score == best]
+    # Ambiguous headers are reported rather than guessed
+    return candidates[0] if len(candidates) == 1 else None
+
+def _member_too_large(size: int) -> bool:
+    return size > settings.INWI_MAX_UPLOAD_MB * 1024 * 1024
+
+def _check_batch_size(csv_files: list):
+    if len(csv_files) >= settings.INWI_BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many files in batch (max {settings.INWI_BATCH_MAX_FILES})"
+        )
+
+async def read_batch_files(files: List[UploadFile]) -> Tuple[List[Tuple[str, bytes]], Dict[str, str]]:
+    """Expand uploaded CSVs and zip archives into (filename, content) pairs, plus per-file errors"""
+    csv_files: List[Tuple[str, bytes]] = []
+    errors: Dict[str, str] = {}
+
+    for upload in files:
+        name = upload.filename or ""
+        max_files = settings.INWI_BATCH_MAX_FILES if name.lower().endswith(".zip") else 1
+        if upload.size and _member_too_large(upload.size // max_files):
+            errors[name] = f"File too large (max {settings.INWI_MAX_UPLOAD_MB * max_files}MB)"
+            continue
+        content = await upload.read()
+
+        if name.lower().endswith(".csv"):
+            _check_batch_size(csv_files)
+            csv_files.append((name, content))
+        elif name.lower().endswith(".zip"):
+            try:
+                archive = zipfile.ZipFile(io.BytesIO(content))
+            except zipfile.BadZipFile:
+                errors[name] = "Invalid zip archive"
+                continue
+            with archive:
+                for member in archive.infolist():
+                    member_name = os.path.basename(member.filename)
+                    if member.is_dir() or member.filename.startswith("__MACOSX/"):
+                        continue
+                    if not member_name.lower().endswith(".csv"):
+                        continue
+                    # Sizes come from the archive directory, checked before inflating
+                    if _member_too_large(member.file_size):
+                        errors[member_name] = f"File too large (max {settings.INWI_MAX_UPLOAD_MB}MB)"
+                        continue
+                    _check_batch_size(csv_files)
+                    csv_files.append((member_name, archive.read(member)))
+        else:
+            errors[name] = "Only CSV and zip files are supported"
+
+    return csv_files, errors
+
+async def analyze_batch(files: List[UploadFile], router: str, analyzer, request: Optional[Request] = None) -> Dict[str, Any]:
+    """
+    Analyze a set of report files in one request
+
+    Each CSV is mapped to its report type and analyzed on the worker pool,
+    at most one job per worker at a time so a batch never trips the queue
+    limit on its own. Results are keyed by report type.
+    """
+    csv_files, errors = await read_batch_files(files)
+
+    jobs: Dict[str, Tuple[str, bytes]] = {}
+    for filename, content in csv_files:
+        report_type = match_report_type(router, filename, content, analyzer)
+        if report_type is None:
+            errors[filename] = "Could not determine report type from file name or header"
+        elif report_type in jobs:
+            errors[filename] = f"Duplicate file for report type '{report_type}' (already using {jobs[report_type][0]})"
+        else:
+            jobs[report_type] = (filename, content)
+
+    if not jobs:
+        raise HTTPException(status_code=400, detail={"message": "No analyzable CSV files in batch", "errors": errors})
+
+    slots = asyncio.Semaphore(analysis_workers.workers)
+
+    async def run(report_type: str, filename: str, content: bytes) -> Dict[str, Any]:
+        async with slots:
+            data, rows_processed, cache_status = await analyze_upload(content, router, report_type, analyzer, request)
+        return {
+            'filename': filename,
+            'data': data,
+            'rows_processed': rows_processed,
+            'cache': cache_status
+        }
+
+    outcomes = await asyncio.gather(
+        *(run(report_type, filename, content) for report_type, (filename, content) in jobs.items()),
+        return_exceptions=True
+    )
+
+    reports: Dict[str, Any] = {}
+    for (report_type, (filename, _)), outcome in zip(jobs.items(), outcomes):
+        if isinstance(outcome, HTTPException):
+            errors[filename] = outcome.detail
+        elif isinstance(outcome, Exception):
+            logger.error(f"Error processing batch file {filename}: {outcome}")
+            errors[filename] = f"Processing error: {str(outcome)}"
+        else:
+            reports[report_type] = outcome
+
+    return {
+        'success': bool(reports),
+        'reports': reports,
+        'errors': errors,
+        'files_processed': len(reports),
+        'rows_processed': sum(report['rows_processed'] for report in reports.values())
+    }
@@ -0,0 +1,221 @@
+from typing import Any, Dict, Iterable, Type, Union
+
+import numpy as np
+import pandas as pd
+
+class ReportAggregate:
+    """
+    Mergeable partial aggregate of one report type
+
+    update() folds in a chunk of rows, merge() combines two partials and
+    result() builds the analyzer payload, so a report can be analyzed in
+    one pass over chunks with memory bounded by the aggregate, not the file.
+    """
+
+    def update(self, df: pd.DataFrame) -> "ReportAggregate":
+        raise NotImplementedError
+
+    def merge(self, other: "ReportAggregate") -> "ReportAggregate":
+        raise NotImplementedError
+
+    def result(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+def _add_counts(counts: Dict[Any, int], values: pd.Series):
+    # value_counts(sort=False) keeps first-appearance order, so ties in the
+    # final ranking break the same way as a single value_counts() over all rows
+    for value, count in values.value_counts(sort=False).items():
+        counts[value] = counts.get(value, 0) + int(count)
+
+def _merge_counts(counts: Dict[Any, int], other: Dict[Any, int]):
+    for value, count in other.items():
+        counts[value] = counts.get(value, 0) + count
+
+class RealtimeAlertsAggregate(ReportAggregate):
+    SEVERITY_COLORS = {
+        'Critical': '#dc2626',  # Rouge foncé
+        'High': '#ea580c',      # Orange foncé
+        'Medium': '#d97706',    # Orange
+        'Low': '#059669'        # Vert
+    }
+    TYPE_COLORS = ['#1e3a8a', '#1e40af', '#1d4ed8', '#2563eb', '#3b82f6', '#60a5fa', '#93c5fd', '#bfdbfe']
+    TOP_ALERT_TYPES = 8
+
+    def __init__(self):
+        self.total = 0
+        self.recent = 0
+        self.severity_counts: Dict[Any, int] = {}
+        self.type_counts: Dict[Any, int] = {}
+        self.hourly_counts = np.zeros(24, dtype=np.int64)
+
+    def update(self, df: pd.DataFrame) -> "RealtimeAlertsAggregate":
+        timestamps = pd.to_datetime(df['timestamp'])
+        minutes_ago = pd.to_numeric(df['minutes_ago'], errors='coerce')
+
+        self.total += len(df)
+        self.recent += int((minutes_ago <= 30).sum())
+        _add_counts(self.severity_counts, df['severity'])
+        _add_counts(self.type_counts, df['alert_type'])
+        self.hourly_counts += np.bincount(timestamps.dt.hour.dropna().astype(int), minlength=24)
+        return self
+
+    def merge(self, other: "RealtimeAlertsAggregate") -> "RealtimeAlertsAggregate":
+        self.total += other.total
+        self.recent += other.recent
+        _merge_counts(self.severity_counts, other.severity_counts)
+        _merge_counts(self.type_counts, other.type_counts)
+        self.hourly_counts += other.hourly_counts
+        return self
+
+    def result(self) -> Dict[str, Any]:
+        total_alerts = self.total
+        critical_alerts = self.severity_counts.get('Critical', 0)
+        high_alerts = self.severity_counts.get('High', 0)
+        medium_alerts = self.severity_counts.get('Medium', 0)
+        low_alerts = self.severity_counts.get('Low', 0)
+
+        # KPI 1: Distribution par Gravité - Enhanced with percentages and colors
+        severity_distribution = []
+        for severity, color in self.SEVERITY_COLORS.items():
+            count = self.severity_counts.get(severity, 0)
+            percentage = (count / total_alerts * 100) if total_alerts > 0 else 0
+            severity_distribution.append({
+                'name': severity,
+                'value': count,
+                'percentage': round(percentage, 1),
+                'color': color
+            })
+
+        # KPI 2: Types d'Alertes - Top 8 most frequent alert types
+        top_types = sorted(self.type_counts.items(), key=lambda item: -item[1])[:self.TOP_ALERT_TYPES]
+        alert_types_distribution = []
+        for i, (alert_type, count) in enumerate(top_types):
+            percentage = (count / total_alerts * 100) if total_alerts > 0 else 0
+            alert_types_distribution.append({
+                'name': alert_type,
+                'value': count,
+                'percentage': round(percentage, 1),
+                'color': self.TYPE_COLORS[i % len(self.TYPE_COLORS)]
+            })
+
+        # KPI 3: Distribution Horaire
+        hourly_data = []
+        for hour in range(24):
+            count = int(self.hourly_counts[hour])
+            percentage = (count / total_alerts * 100) if total_alerts > 0 else 0
+
+            # Determine peak hours (higher activity)
+            is_peak = count > (total_alerts / 24 * 1.5) if total_alerts > 0 else False
+
+            hourly_data.append({
+                'hour': f"{hour:02d}:00",
+                'hour_num': hour,
+                'alerts': count,
+                'percentage': round(percentage, 1),
+                'is_peak': is_peak,
+                'color': '#dc2626' if is_peak else '#3b82f6'
+            })
+
+        peak_hours = [h for h in hourly_data if h['is_peak']]
+        avg_hourly = total_alerts / 24 if total_alerts > 0 else 0
+
+        return {
+            'kpis': {
+                'critical_alerts': critical_alerts,
+                'high_alerts': high_alerts,
+                'medium_alerts': medium_alerts,
+                'low_alerts': low_alerts,
+                'recent_alerts_30min': self.recent,
+                'total_active_alerts': total_alerts,
+                'peak_hours_count': len(peak_hours),
+                'avg_hourly_alerts': round(avg_hourly, 1),
+                'most_common_type': top_types[0][0] if top_types else 'N/A',
+                'severity_ratio_critical': round((critical_alerts / total_alerts * 100), 1) if total_alerts > 0 else 0
+            },
+            'charts': {
+                'severity_distribution': severity_distribution,
+                'alert_types': alert_types_distribution,
+                'hourly_distribution': hourly_data
+            }
+        }
+
+class EventProcessingAggregate(ReportAggregate):
+    def __init__(self):
+        self.events_sum = 0
+        self.events_count = 0
+        self.alerts_sum = 0
+        self.rate_sum = 0.0
+        self.rate_count = 0
+        # Per-day sums and counts, indexed by date; bounded by the number of days
+        self.daily: pd.DataFrame = None
+
+    def update(self, df: pd.DataFrame) -> "EventProcessingAggregate":
+        frame = pd.DataFrame({
+            'date': pd.to_datetime(df['date']),
+            'events_count': pd.to_numeric(df['events_count'], errors='coerce'),
+            'alerts_generated': pd.to_numeric(df['alerts_generated'], errors='coerce'),
+            'processing_rate': pd.to_numeric(df['processing_rate'], errors='coerce'),
+        })
+
+        self.events_sum += frame['events_count'].sum()
+        self.events_count += int(frame['events_count'].count())
+        self.alerts_sum += frame['alerts_generated'].sum()
+        self.rate_sum += frame['processing_rate'].sum()
+        self.rate_count += int(frame['processing_rate'].count())
+
+        daily = frame.groupby('date').agg(
+            events_count=('events_count', 'sum'),
+            alerts_generated=('alerts_generated', 'sum'),
+            rate_sum=('processing_rate', 'sum'),
+            rate_count=('processing_rate', 'count'),
+        )
+        self._merge_daily(daily)
+        return self
+
+    def merge(self, other: "EventProcessingAggregate") -> "EventProcessingAggregate":
+        self.events_sum += other.events_sum
+        self.events_count += other.events_count
+        self.alerts_sum += other.alerts_sum
+        self.rate_sum += other.rate_sum
+        self.rate_count += other.rate_count
+        if other.daily is not None:
+            self._merge_daily(other.daily)
+        return self
+
+    def _merge_daily(self, daily: pd.DataFrame):
+        if self.daily is None:
+            self.daily = daily
+        else:
+            self.daily = pd.concat([self.daily, daily]).groupby(level=0).sum()
+
+    def result(self) -> Dict[str, Any]:
+        avg_processing_rate = self.rate_sum / self.rate_count if self.rate_count else float('nan')
+        daily_avg_events = self.events_sum / self.events_count if self.events_count else float('nan')
+
+        daily_processing = {}
+        if self.daily is not None:
+            daily_processing = pd.DataFrame({
+                'events_count': self.daily['events_count'],
+                'processing_rate': self.daily['rate_sum'] / self.daily['rate_count'],
+            }).to_dict('index')
+
+        return {
+            'kpis': {
+                'events_per_day': f"{daily_avg_events/1000000:.1f}M",
+                'alerts_generated': int(self.alerts_sum),
+                'processing_rate': f"{avg_processing_rate:.1f}%",
+                'total_events_processed': int(self.events_sum)
+            },
+            'charts': {
+                'daily_events': {str(date): data['events_count'] for date, data in daily_processing.items()},
+                'processing_efficiency': {str(date): data['processing_rate'] for date, data in daily_processing.items()}
+            }
+        }
+
+def aggregate(aggregate_cls: Type[ReportAggregate], data: Union[pd.DataFrame, Iterable[pd.DataFrame]]) -> Dict[str, Any]:
+    """Analyze a whole DataFrame or an iterable of DataFrame chunks with one aggregate"""
+    chunks = [data] if isinstance(data, pd.DataFrame) else data
+    partial = aggregate_cls()
+    for chunk in chunks:
+        partial.update(chunk)
+    return partial.result()
@@ -0,0 +1,197 @@
+import codecs
+import csv
+import io
+import logging
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
+
+# Bytes inspected to choose between utf-8 and latin-1 before parsing
+ENCODING_SNIFF_BYTES = 64 * 1024
+
+# Per-router, per-report-type CSV schemas:
+#   usecols     - columns the analyzer reads; other columns are never materialized
+#   parse_dates - columns the analyzer converts with pd.to_datetime anyway
+# Other dtypes are inferred: the parser already types numeric and text columns
+# in one pass, and declaring category for text columns made a 100MB upload
+# slower overall. Report types without an entry keep every column.
+REPORT_SCHEMAS: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "inwi": {
+        "realtime_alerts": {
+            "usecols": ["timestamp", "minutes_ago", "severity", "alert_type"],
+            "parse_dates": ["timestamp"],
+        },
+        "event_processing": {
+            "usecols": ["date", "events_count", "alerts_generated", "processing_rate"],
+            "parse_dates": ["date"],
+        },
+        "detection_efficiency": {
+            # date is grouped on as text, so it is not parsed
+            "usecols": ["date", "false_positive_rate", "detection_precision", "true_positives", "false_positives"],
+        },
+        "response_times": {
+            "usecols": ["critical_response_min", "high_response_min", "medium_response_min", "low_response_min"],
+        },
+        "system_status": {
+            "usecols": ["system_name", "status", "availability_pct"],
+        },
+        "resource_allocation": {
+            "usecols": ["timestamp", "current_load_pct", "active_analysts", "total_analysts"],
+        },
+        "detection_rules": {
+            "usecols": ["active_rules", "custom_rules", "mitre_coverage_pct", "new_rules_7d"],
+        },
+        "threat_intelligence": {
+            "usecols": [
+                "new_threats", "ip_indicators", "domain_indicators", "hash_indicators",
+                "automation_rate", "mttr_min", "incidents_prevented",
+            ],
+        },
+    },
+    "inwi2": {
+        "ciso_incident_report": {
+            "usecols": [
+                "date", "incidents_critical", "incidents_high", "incidents_medium", "incidents_low",
+                "mttd_hours", "mttr_hours", "mttc_hours", "sla_compliance_rate",
+            ],
+            "parse_dates": ["date"],
+        },
+        "ciso_vulnerability_report": {
+            "usecols": [
+                "date", "critical_vulns", "high_vulns", "medium_vulns", "low_vulns",
+                "critical_vulnerabilities", "new_vulnerabilities", "resolved_vulnerabilities",
+                "total_active_vulnerabilities", "avg_patching_time_days",
+            ],
+            "parse_dates": ["date"],
+        },
+        "ciso_system_availability": {
+            "usecols": ["date", "availability_rate", "downtime_minutes", "outages_count"],
+            "parse_dates": ["date"],
+        },
+        "ciso_detection_rules": {
+            "usecols": [
+                "date", "total_active_rules", "active_rules", "custom_rules_pct", "mitre_coverage_pct",
+                "new_rules_added", "rules_disabled", "disabled_rules",
+            ],
+            "parse_dates": ["date"],
+        },
+        "ciso_threat_intelligence": {
+            "usecols": [
+                "date", "new_iocs", "active_ips", "active_domains", "active_hashes",
+                "campaigns_detected", "ioc_utilization_rate",
+            ],
+            "parse_dates": ["date"],
+        },
+        "ciso_awareness_training": {
+            "usecols": [
+                "date", "employees_trained", "total_employees", "training_participation_rate",
+                "phishing_failure_rate", "average_score",
+            ],
+            "parse_dates": ["date"],
+        },
+        "ciso_attack_surface": {
+            "usecols": [
+                "date", "total_assets", "exposed_assets", "exposure_percentage", "exposure_score",
+                "critical_services_exposed", "shadow_it_detected", "risk_level",
+            ],
+            "parse_dates": ["date"],
+        },
+        "ciso_security_projects": {
+            "usecols": [
+                "date", "total_projects", "projects_completed_pct", "projects_progress_pct",
+                "projects_delayed_pct", "budget_utilization_pct",
+            ],
+            "parse_dates": ["date"],
+        },
+    },
+    # inwi3 analyzers discover optional columns at runtime, so they keep every column
+    "inwi3": {},
+}
+
+def detect_encoding(content: bytes) -> str:
+    """utf-8 if the leading bytes decode cleanly (ignoring a split trailing character), else latin-1"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        decoder.decode(content[:ENCODING_SNIFF_BYTES], final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+def _read_header(content: bytes, encoding: str) -> List[str]:
+    first_line = content.split(b"\n", 1)[0]
+    # Excel writes a utf-8 byte order mark; the parsers drop it from the first column name too
+    if first_line.startswith(codecs.BOM_UTF8):
+        first_line = first_line[len(codecs.BOM_UTF8):]
+    first_line = first_line.decode(encoding, errors="replace")
+    return next(csv.reader([first_line]), [])
+
+def read_header(content: bytes) -> List[str]:
+    """Column names of an uploaded report, without parsing its rows"""
+    return _read_header(content[:ENCODING_SNIFF_BYTES], detect_encoding(content))
+
+def _schema_kwargs(header: List[str], schema: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    kwargs: Dict[str, Any] = {}
+    if not schema:
+        return kwargs
+    # Keep analyzer error messages unchanged: only select columns that exist,
+    # and fall back to every column when none of the expected ones do
+    usecols = [column for column in header if column in schema.get("usecols", ())]
+    if usecols:
+        kwargs["usecols"] = usecols
+    parse_dates = [column for column in schema.get("parse_dates", ()) if column in usecols]
+    if parse_dates:
+        kwargs["parse_dates"] = parse_dates
+    return kwargs
+
+def _read(content: bytes, encoding: str, schema: Optional[Dict[str, Any]]) -> pd.DataFrame:
+    if encoding == "latin-1" and content.startswith(codecs.BOM_UTF8):
+        # Only utf-8 parsing skips the mark; as latin-1 it would prefix the first column name
+        content = content[len(codecs.BOM_UTF8):]
+    kwargs = _schema_kwargs(_read_header(content, encoding), schema)
+    return pd.read_csv(io.BytesIO(content), encoding=encoding, engine=CSV_ENGINE, **kwargs)
+
+def _has_undecoded_columns(df: pd.DataFrame) -> bool:
+    # pyarrow does not fail on invalid utf-8: the whole column is typed as binary
+    # and comes back as bytes objects, so checking one value per column is enough
+    for column in df.select_dtypes(include=["object", "string"]):
+        values = df[column].dropna()
+        if not values.empty and isinstance(values.iat[0], bytes):
+            return True
+    return False
+
+def load_report_csv(content: bytes, router: str, report_type: str) -> pd.DataFrame:
+    """Parse an uploaded report straight from bytes using its schema"""
+    schema = REPORT_SCHEMAS.get(router, {}).get(report_type)
+    encoding = detect_encoding(content)
+    if encoding == "utf-8":
+        try:
+            df = _read(content, encoding, schema)
+            if not _has_undecoded_columns(df):
+                return df
+        except UnicodeDecodeError:
+            pass
+        # Invalid utf-8 beyond the sniffed prefix
+        logger.info("Upload is not valid utf-8 past the sniffed prefix, re-reading as latin-1")
+    return _read(content, "latin-1", schema)
+
+def iter_report_csv(
+    fileobj: BinaryIO, router: str, report_type: str, encoding: str, chunksize: int
+) -> Iterator[pd.DataFrame]:
+    """Parse a report file in chunks of at most chunksize rows, using its schema"""
+    fileobj.seek(0)
+    first_line = fileobj.readline()
+    header = _read_header(first_line, encoding)
+    # Start past a byte order mark so latin-1 parsing does not keep it in the first column name
+    fileobj.seek(len(codecs.BOM_UTF8) if first_line.startswith(codecs.BOM_UTF8) else 0)
+    kwargs = _schema_kwargs(header, REPORT_SCHEMAS.get(router, {}).get(report_type))
+    # pyarrow does not support chunksize
+    with pd.read_csv(fileobj, encoding=encoding, engine="c", chunksize=chunksize, **kwargs) as reader:
+        yield from reader
@@ -0,0 +1,147 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+import uuid
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Marks files a worker is still rendering; pruned only once they outlive the TTL
+STAGING_MARKER = ".tmp."
+
+class ExportCache:
+    """
+    Rendered exports on disk, keyed by a hash of what they were rendered from
+
+    Files are stored as {key}.{format} in one directory, and a file's mtime
+    records its last use: hits touch it, and prune() removes expired files,
+    then the least recently used ones until the directory fits in max_bytes.
+    Several app processes can share the directory.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, ttl: float):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+    @staticmethod
+    def key(analysis_data: Dict[str, Any], report_type: str, export_format: str, renderer_version: int) -> str:
+        """Hash of the canonical JSON form, so key order in the payload does not matter"""
+        canonical = json.dumps(
+            [analysis_data, report_type, export_format, renderer_version],
+            sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str,
+        )
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def _path(self, key: str, export_format: str) -> str:
+        return os.path.join(self.directory, f"{key}.{export_format}")
+
+    def open(self, key: str, export_format: str) -> Optional[BinaryIO]:
+        """
+        The cached export opened for reading and marked as just used, or None
+
+        An open file stays readable after prune() in another process unlinks
+        it, so a hit can no longer vanish before it is sent.
+        """
+        path = self._path(key, export_format)
+        try:
+            file = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            if time.time() - os.fstat(file.fileno()).st_mtime > self.ttl:
+                file.close()
+                return None
+            os.utime(path)
+        except FileNotFoundError:
+            # Pruned between open and touch: the handle is still good
+            pass
+        return file
+
+    def staging_path(self, key: str, export_format: str) -> str:
+        """Unique path to render into before put() moves the file in place"""
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, f"{key}.{uuid.uuid4().hex}{STAGING_MARKER}{export_format}")
+
+    def put(self, staging_path: str, key: str, export_format: str) -> str:
+        # Rename so concurrent readers never see a partial file
+        path = self._path(key, export_format)
+        os.replace(staging_path, path)
+        self.prune(keep=path)
+        return path
+
+    def discard(self, staging_path: str):
+        """Remove a staging file left by a failed or abandoned render, if any"""
+        try:
+            os.remove(staging_path)
+        except FileNotFoundError:
+            pass
+
+    def prune(self, keep: Optional[str] = None) -> int:
+        """
+        Delete expired files, then least recently used ones over max_bytes
+
+        `keep` is never evicted, so a file about to be sent survives a cap
+        smaller than itself. Returns how many files were removed.
+        """
+        now = time.time()
+        entries: List[Tuple[float, int, str]] = []
+        expired: List[str] = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.is_file():
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    if now - stat.st_mtime > self.ttl:
+                        expired.append(entry.path)
+                    elif STAGING_MARKER not in entry.name:
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except FileNotFoundError:
+            return 0
+
+        total = sum(size for _, size, _ in entries)
+        evicted = []
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            evicted.append(path)
+            total -= size
+
+        removed = 0
+        for path in expired + evicted:
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    async def run_cleanup_loop(self):
+        """Periodically prune the cache directory; started from the app lifespan"""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                removed = await loop.run_in_executor(None, self.prune)
+                if removed:
+                    logger.info(f"Export cache cleanup removed {removed} files")
+            except Exception as e:
+                logger.error(f"Export cache cleanup failed: {e}")
+            await asyncio.sleep(settings.INWI_EXPORT_CACHE_CLEANUP_SECONDS)
+
+export_cache = ExportCache(
+    directory=settings.INWI_EXPORT_CACHE_DIR or os.path.join(tempfile.gettempdir(), "inwi-exports"),
+    max_bytes=settings.INWI_EXPORT_CACHE_MAX_MB * 1024 * 1024,
+    ttl=settings.INWI_EXPORT_CACHE_TTL_SECONDS,
+)
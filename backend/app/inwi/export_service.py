@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends, Request
-from fastapi.responses import FileResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import matplotlib
 matplotlib.use('Agg')  # Use non-interactive backend
@@ -14,12 +15,15 @@ from datetime import datetime
 import io
 import base64
 import json
-from typing import Dict, List, Any, Optional
+from typing import BinaryIO, Dict, List, Any, Optional, Tuple
 import tempfile
 import os
 from pathlib import Path
 from app.auth import models as auth_models
-from app.auth.auth_routes import get_current_user
+from app.auth.admin_routes import require_permission
+from app.core.config import settings
+from app.core.workers import ProcessWorkerPool
+from app.inwi.export_cache import ExportCache, export_cache
 import logging
 
 # Configure logging
@@ -36,6 +40,9 @@ class ExportRequest(BaseModel):
 number_regex = r'[\d.]+'
 
 class DashboardExporter:
+    # Part of the export cache key: bump when rendered output changes
+    version = 1
+
     def __init__(self):
         # Set matplotlib style for professional reports
         try:
@@ -356,15 +363,16 @@ class DashboardExporter:
         plt.tight_layout()
         return fig
 
-    def export_to_pdf(self, analysis_data: Dict[str, Any], report_type: str, filename: str = None) -> str:
+    def export_to_pdf(self, analysis_data: Dict[str, Any], report_type: str, filename: str = None,
+                      output_dir: str = None) -> str:
         """Export dashboard analysis to PDF"""
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             safe_report_type = secure_filename(report_type)
-            filename = f"dashboard_soc_{safe_report_type}_{timestamp}.png"
+            filename = f"dashboard_soc_{safe_report_type}_{timestamp}.pdf"
         
         # Create temporary file
-        temp_dir = tempfile.gettempdir()
+        temp_dir = output_dir or tempfile.gettempdir()
         pdf_path = os.path.join(temp_dir, filename)
         
         with PdfPages(pdf_path) as pdf:
@@ -410,14 +418,15 @@ class DashboardExporter:
         
         return pdf_path
 
-    def export_to_png(self, analysis_data: Dict[str, Any], report_type: str, filename: str = None) -> str:
+    def export_to_png(self, analysis_data: Dict[str, Any], report_type: str, filename: str = None,
+                      output_dir: str = None) -> str:
         """Export dashboard analysis to PNG (summary view)"""
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             safe_report_type = secure_filename(report_type)
             filename = f"dashboard_soc_{safe_report_type}_{timestamp}.png"
         # Create temporary file
-        temp_dir = tempfile.gettempdir()
+        temp_dir = output_dir or tempfile.gettempdir()
         png_path = os.path.join(temp_dir, filename)
         
         # Create a comprehensive dashboard view
@@ -577,29 +586,105 @@ class DashboardExporter:
 # Create exporter instance
 exporter = DashboardExporter()
 
+def _warm_export_worker():
+    """Export worker initializer: render a throwaway figure so fonts and backends load before the first export"""
+    fig = plt.figure(figsize=(2, 2))
+    fig.suptitle('Rapport SOC', fontweight='bold')
+    fig.text(0.5, 0.5, 'Généré le', ha='center', style='italic')
+    with io.BytesIO() as buffer:
+        fig.savefig(buffer, format='png')
+        fig.savefig(buffer, format='pdf')
+    plt.close(fig)
+
+def render_export(export_format: str, analysis_data: Dict[str, Any], report_type: str, path: str) -> str:
+    """Worker process entry point: render an export to `path`"""
+    filename, output_dir = os.path.basename(path), os.path.dirname(path)
+    if export_format == 'pdf':
+        return exporter.export_to_pdf(analysis_data, report_type, filename, output_dir)
+    return exporter.export_to_png(analysis_data, report_type, filename, output_dir)
+
+# pyplot state is global, so exports render one at a time per worker process, off the event loop
+export_workers = ProcessWorkerPool(
+    "inwi-export",
+    workers=settings.INWI_EXPORT_WORKERS,
+    queue_size=settings.INWI_EXPORT_QUEUE_SIZE,
+    timeout=settings.INWI_EXPORT_TIMEOUT_SECONDS,
+    initializer=_warm_export_worker,
+)
+
+# Read size when streaming an export to the client
+EXPORT_SEND_BLOCK_BYTES = 256 * 1024
+
+async def cached_export(data: ExportRequest, export_format: str, request: Request) -> Tuple[BinaryIO, str, str]:
+    """
+    Render an export, or reuse the file rendered earlier for the same payload
+
+    Returns (open file, download filename, cache) where cache is "hit" or "miss".
+    The file is opened here, so a prune in another process cannot remove it
+    before it is sent; a cache file that is already gone counts as a miss.
+    Cache file operations run in the threadpool so the event loop never waits
+    on the filesystem.
+    """
+    key = ExportCache.key(data.analysisResult, data.reportType, export_format, DashboardExporter.version)
+    file = await run_in_threadpool(export_cache.open, key, export_format)
+    cache_status = "hit"
+    if file is None:
+        staging_path = await run_in_threadpool(export_cache.staging_path, key, export_format)
+        try:
+            await export_workers.run(
+                render_export, export_format, data.analysisResult, data.reportType, staging_path, request=request
+            )
+            # Opened before it is published; the rename keeps the handle valid
+            file = await run_in_threadpool(open, staging_path, "rb")
+            try:
+                await run_in_threadpool(export_cache.put, staging_path, key, export_format)
+            except BaseException:
+                file.close()
+                raise
+        finally:
+            await run_in_threadpool(export_cache.discard, staging_path)
+        cache_status = "miss"
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    download_name = f"dashboard_soc_{secure_filename(data.reportType)}_{timestamp}.{export_format}"
+    return file, download_name, cache_status
+
+def export_response(file: BinaryIO, media_type: str, download_name: str, cache_status: str) -> StreamingResponse:
+    """Send an export from its open file, closing it once sent"""
+    size = os.fstat(file.fileno()).st_size
+
+    def blocks():
+        with file:
+            yield from iter(lambda: file.read(EXPORT_SEND_BLOCK_BYTES), b"")
+
+    return StreamingResponse(
+        blocks(),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename={download_name}",
+            "Content-Length": str(size),
+            "X-Export-Cache": cache_status
+        }
+    )
+
 @router.post("/inwi/export/pdf")
 async def export_dashboard_pdf(
     data: ExportRequest,
-    current_user: auth_models.User = Depends(get_current_user)
+    request: Request,
+    current_user: auth_models.User = Depends(require_permission("export_data"))
 ):
     """Export dashboard analysis to PDF"""
     try:
         logger.info(f"User {current_user.email} exporting dashboard to PDF")
         
-        analysis_data = data.analysisResult
-        report_type = data.reportType
-        
-        # Generate PDF
-        pdf_path = exporter.export_to_pdf(analysis_data, report_type)
+        # Generate PDF, or reuse an identical earlier export
+        pdf_file, download_name, cache_status = await cached_export(data, 'pdf', request)
         
         # Return file
-        return FileResponse(
-            path=pdf_path,
-            media_type='application/pdf',
-            filename=os.path.basename(pdf_path),
-            headers={"Content-Disposition": f"attachment; filename={os.path.basename(pdf_path)}"}
-        )
+        return export_response(pdf_file, 'application/pdf', download_name, cache_status)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error exporting to PDF: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Export error: {str(e)}")
@@ -607,74 +692,21 @@ async def export_dashboard_pdf(
 @router.post("/inwi/export/png")
 async def export_dashboard_png(
     data: ExportRequest,
-    current_user: auth_models.User = Depends(get_current_user)
+    request: Request,
+    current_user: auth_models.User = Depends(require_permission("export_data"))
 ):
     """Export dashboard analysis to PNG"""
     try:
         logger.info(f"User {current_user.email} exporting dashboard to PNG")
         
-        analysis_data = data.analysisResult
-        report_type = data.reportType
-        
-        # Generate PNG
-        png_path = exporter.export_to_png(analysis_data, report_type)
-        
-        # Return file
-        return FileResponse(
-            path=png_path,
-            media_type='image/png',
-            filename=os.path.basename(png_path),
-            headers={"Content-Disposition": f"attachment; filename={os.path.basename(png_path)}"}
-        )
-        
-    except Exception as e:
-        logger.error(f"Error exporting to PNG: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Export error: {str(e)}")
-
-@router.post("/inwi/export/pdf-test")
-async def export_dashboard_pdf_test(data: ExportRequest):
-    """Export dashboard analysis to PDF - TEST VERSION WITHOUT AUTH"""
-    try:
-        logger.info("Test export to PDF")
-        
-        analysis_data = data.analysisResult
-        report_type = data.reportType
-        
-        # Generate PDF
-        pdf_path = exporter.export_to_pdf(analysis_data, report_type)
-        
-        # Return file
-        return FileResponse(
-            path=pdf_path,
-            media_type='application/pdf',
-            filename=os.path.basename(pdf_path),
-            headers={"Content-Disposition": f"attachment; filename={os.path.basename(pdf_path)}"}
-        )
-        
-    except Exception as e:
-        logger.error(f"Error exporting to PDF: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Export error: {str(e)}")
-
-@router.post("/inwi/export/png-test")
-async def export_dashboard_png_test(data: ExportRequest):
-    """Export dashboard analysis to PNG - TEST VERSION WITHOUT AUTH"""
-    try:
-        logger.info("Test export to PNG")
-        
-        analysis_data = data.analysisResult
-        report_type = data.reportType
-        
-        # Generate PNG
-        png_path = exporter.export_to_png(analysis_data, report_type)
+        # Generate PNG, or reuse an identical earlier export
+        png_file, download_name, cache_status = await cached_export(data, 'png', request)
         
         # Return file
-        return FileResponse(
-            path=png_path,
-            media_type='image/png',
-            filename=os.path.basename(png_path),
-            headers={"Content-Disposition": f"attachment; filename={os.path.basename(png_path)}"}
-        )
+        return export_response(png_file, 'image/png', download_name, cache_status)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error exporting to PNG: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Export error: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,197 @@
+import math
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+from sqlalchemy import Integer, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from ..dashboard.models import IncidentReportHistory, VulnerabilityReportHistory
+
+# Report types whose uploads are kept as history and analyzed in SQL. History
+# is organisation-wide, not per user: one row per date, whoever uploaded it.
+HISTORY_MODELS = {
+    "ciso_incident_report": IncidentReportHistory,
+    "ciso_vulnerability_report": VulnerabilityReportHistory,
+}
+
+UPSERT_BATCH_ROWS = 1000
+
+def _value_columns(model) -> List[str]:
+    return [column.name for column in model.__table__.columns if column.name not in ("date", "updated_at")]
+
+def history_rows(df: pd.DataFrame, model) -> List[Dict[str, Any]]:
+    """Rows of an uploaded report as upsert parameters; the last row wins for a repeated date"""
+    columns = _value_columns(model)
+    integer_columns = {name for name in columns if isinstance(model.__table__.c[name].type, Integer)}
+
+    frame = pd.DataFrame({"date": pd.to_datetime(df["date"], errors="coerce").dt.date})
+    for name in columns:
+        frame[name] = pd.to_numeric(df[name], errors="coerce") if name in df.columns else math.nan
+    frame = frame.dropna(subset=["date"]).drop_duplicates(subset="date", keep="last")
+
+    def convert(name: str, value) -> Optional[float]:
+        if pd.isna(value):
+            return None
+        return int(round(value)) if name in integer_columns else float(value)
+
+    return [
+        {"date": row[0], **{name: convert(name, value) for name, value in zip(columns, row[1:])}}
+        for row in frame.itertuples(index=False, name=None)
+    ]
+
+def upsert_history(db: Session, report_type: str, df: pd.DataFrame) -> int:
+    """Insert or overwrite the uploaded dates; returns how many rows were written"""
+    model = HISTORY_MODELS[report_type]
+    rows = history_rows(df, model)
+    columns = _value_columns(model)
+    # Batched to stay under Postgres' bind parameter limit
+    for start in range(0, len(rows), UPSERT_BATCH_ROWS):
+        statement = insert(model.__table__).values(rows[start:start + UPSERT_BATCH_ROWS])
+        statement = statement.on_conflict_do_update(
+            index_elements=["date"],
+            set_={**{name: statement.excluded[name] for name in columns}, "updated_at": func.now()},
+        )
+        db.execute(statement)
+    db.commit()
+    return len(rows)
+
+def _window(db: Session, model, months: Optional[int]):
+    """Filter to the last `months` calendar months, counted back from the newest stored date"""
+    if months is None:
+        return []
+    newest = db.query(func.max(model.date)).scalar_subquery()
+    return [model.date >= func.date_trunc("month", newest) - func.make_interval(0, months - 1)]
+
+def _month(model):
+    return func.to_char(func.date_trunc("month", model.date), "YYYY-MM")
+
+def _sum(column):
+    return func.coalesce(func.sum(column), 0)
+
+def _avg(value) -> float:
+    # pandas' mean() of an all-missing column is NaN, which the payload formats as "nan"
+    return float(value) if value is not None else math.nan
+
+def _incident_summary(db: Session, months: Optional[int]) -> Dict[str, Any]:
+    H = IncidentReportHistory
+    window = _window(db, H, months)
+
+    totals = db.query(
+        _sum(H.incidents_critical),
+        _sum(H.incidents_high),
+        _sum(H.incidents_medium),
+        _sum(H.incidents_low),
+        func.avg(H.sla_compliance_rate),
+        func.avg(H.mttr_hours),
+        func.avg(H.mttd_hours),
+        func.avg(H.mttc_hours),
+    ).filter(*window).one()
+    total_critical, total_high, total_medium, total_low = (int(v) for v in totals[:4])
+    avg_sla_compliance, avg_mttr, avg_mttd, avg_mttc = (_avg(v) for v in totals[4:])
+    total_incidents = total_critical + total_high + total_medium + total_low
+
+    month = _month(H)
+    monthly = (
+        db.query(month, _sum(H.incidents_critical) + _sum(H.incidents_high) + _sum(H.incidents_medium) + _sum(H.incidents_low))
+        .filter(*window)
+        .group_by(month)
+        .order_by(month)
+        .all()
+    )
+
+    return {
+        'kpis': {
+            'total_incidents': total_incidents,
+            'critical_incidents': total_critical,
+            'high_incidents': total_high,
+            'sla_compliance': f"{avg_sla_compliance:.1f}%",
+            'mttr': f"{avg_mttr:.1f}h",
+            'mttd': f"{avg_mttd:.1f}h",
+            'mttc': f"{avg_mttc:.1f}h"
+        },
+        'charts': {
+            'incidents_by_criticality': {
+                'Critical': total_critical,
+                'High': total_high,
+                'Medium': total_medium,
+                'Low': total_low
+            },
+            'monthly_trends': {period: int(total) for period, total in monthly},
+            'response_metrics': {
+                'MTTR': avg_mttr,
+                'MTTD': avg_mttd,
+                'MTTC': avg_mttc
+            }
+        }
+    }
+
+def _vulnerability_summary(db: Session, months: Optional[int]) -> Dict[str, Any]:
+    H = VulnerabilityReportHistory
+    window = _window(db, H, months)
+
+    total_new, total_resolved, avg_patching_time = db.query(
+        _sum(H.new_vulnerabilities),
+        _sum(H.resolved_vulnerabilities),
+        func.avg(H.avg_patching_time_days),
+    ).filter(*window).one()
+    total_new, total_resolved, avg_patching_time = int(total_new), int(total_resolved), _avg(avg_patching_time)
+
+    # Current state is the newest stored day; with no history stored every count is 0
+    latest = db.query(H).filter(*window).order_by(H.date.desc()).first()
+    current_active = getattr(latest, "total_active_vulnerabilities", None) or 0
+    latest_critical = getattr(latest, "critical_vulns", None) or 0
+    latest_high = getattr(latest, "high_vulns", None) or 0
+    latest_medium = getattr(latest, "medium_vulns", None) or 0
+    latest_low = getattr(latest, "low_vulns", None) or 0
+
+    month = _month(H)
+    monthly = (
+        db.query(month, _sum(H.new_vulnerabilities), _sum(H.resolved_vulnerabilities))
+        .filter(*window)
+        .group_by(month)
+        .order_by(month)
+        .all()
+    )
+
+    return {
+        'kpis': {
+            'active_vulnerabilities': current_active,
+            'new_vulnerabilities': total_new,
+            'resolved_vulnerabilities': total_resolved,
+            'critical_vulnerabilities': latest_critical,
+            'avg_patching_time': f"{avg_patching_time:.1f} days",
+            'resolution_rate': f"{(total_resolved/(total_new+1)*100):.1f}%"
+        },
+        'charts': {
+            'vulnerability_by_criticality': {
+                'Critical': latest_critical,
+                'High': latest_high,
+                'Medium': latest_medium,
+                'Low': latest_low
+            },
+            'monthly_trends': {period: {'new': int(new), 'resolved': int(resolved)} for period, new, resolved in monthly},
+            'patching_performance': {
+                'Target': 30,
+                'Current': avg_patching_time
+            }
+        }
+    }
+
+HISTORY_SUMMARIES = {
+    "ciso_incident_report": _incident_summary,
+    "ciso_vulnerability_report": _vulnerability_summary,
+}
+
+def history_row_count(db: Session, report_type: str) -> int:
+    model = HISTORY_MODELS[report_type]
+    return db.query(func.count(model.date)).scalar()
+
+def analyze_history(db: Session, report_type: str, months: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Analysis payload computed in SQL over the stored history
+
+    Same shape as the matching CISOAnalyzer report; `months` limits it to the
+    most recent calendar months.
+    """
+    return HISTORY_SUMMARIES[report_type](db, months)
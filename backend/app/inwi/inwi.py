@@ -1,10 +1,12 @@
-from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Depends
+from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Depends, Request
 import pandas as pd
-import io
 from datetime import datetime
 from typing import Dict, Any
 from app.auth import models as auth_models
 from app.auth.auth_routes import get_current_user
+from app.core.config import settings
+from app.inwi.analysis_cache import analyze_upload, analyze_upload_stream
+from app.inwi.chunked import aggregate, RealtimeAlertsAggregate, EventProcessingAggregate
 import logging
 
 # Configure logging
@@ -14,6 +16,9 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 class SOCAnalyzer:
+    # Part of the analysis cache key: bump when analysis output changes
+    version = 1
+
     def __init__(self):
         self.report_types = {
             'realtime_alerts': self.analyze_realtime_alerts,
@@ -25,139 +30,21 @@ class SOCAnalyzer:
             'detection_rules': self.analyze_detection_rules,
             'threat_intelligence': self.analyze_threat_intelligence
         }
+        # Report types analyzed from CSV chunks, so uploads may exceed the in-memory size limit
+        self.chunked_report_types = {'realtime_alerts', 'event_processing'}
     
-    def analyze_realtime_alerts(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def analyze_realtime_alerts(self, data) -> Dict[str, Any]:
         """Analyze real-time alerts data for SOC dashboard - Enhanced for 3 key KPIs"""
         try:
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df['minutes_ago'] = pd.to_numeric(df['minutes_ago'], errors='coerce')
-            
-            # Current active alerts by severity
-            critical_alerts = len(df[df['severity'] == 'Critical'])
-            high_alerts = len(df[df['severity'] == 'High'])
-            medium_alerts = len(df[df['severity'] == 'Medium'])
-            low_alerts = len(df[df['severity'] == 'Low'])
-            
-            # Recent alerts (last 30 minutes)
-            recent_alerts = len(df[df['minutes_ago'] <= 30])
-            
-            # KPI 1: Distribution par Gravité - Enhanced with percentages and colors
-            total_alerts = len(df)
-            severity_distribution = []
-            severity_colors = {
-                'Critical': '#dc2626',  # Rouge foncé
-                'High': '#ea580c',      # Orange foncé
-                'Medium': '#d97706',    # Orange
-                'Low': '#059669'        # Vert
-            }
-            
-            for severity in ['Critical', 'High', 'Medium', 'Low']:
-                count = len(df[df['severity'] == severity])
-                percentage = (count / total_alerts * 100) if total_alerts > 0 else 0
-                severity_distribution.append({
-                    'name': severity,
-                    'value': count,
-                    'percentage': round(percentage, 1),
-                    'color': severity_colors[severity]
-                })
-            
-            # KPI 2: Types d'Alertes - Top 8 most frequent alert types
-            alert_types_raw = df['alert_type'].value_counts().head(8)
-            alert_types_distribution = []
-            type_colors = ['#1e3a8a', '#1e40af', '#1d4ed8', '#2563eb', '#3b82f6', '#60a5fa', '#93c5fd', '#bfdbfe']
-            
-            for i, (alert_type, count) in enumerate(alert_types_raw.items()):
-                percentage = (count / total_alerts * 100) if total_alerts > 0 else 0
-                alert_types_distribution.append({
-                    'name': alert_type,
-                    'value': count,
-                    'percentage': round(percentage, 1),
-                    'color': type_colors[i % len(type_colors)]
-                })
-            
-            # KPI 3: Distribution Horaire - Enhanced hourly analysis
-            df['hour'] = df['timestamp'].dt.hour
-            hourly_data = []
-            
-            # Create complete 24-hour distribution
-            for hour in range(24):
-                count = len(df[df['hour'] == hour])
-                percentage = (count / total_alerts * 100) if total_alerts > 0 else 0
-                
-                # Determine peak hours (higher activity)
-                is_peak = count > (total_alerts / 24 * 1.5) if total_alerts > 0 else False
-                
-                hourly_data.append({
-                    'hour': f"{hour:02d}:00",
-                    'hour_num': hour,
-                    'alerts': count,
-                    'percentage': round(percentage, 1),
-                    'is_peak': is_peak,
-                    'color': '#dc2626' if is_peak else '#3b82f6'
-                })
-            
-            # Calculate additional metrics
-            peak_hours = [h for h in hourly_data if h['is_peak']]
-            avg_hourly = total_alerts / 24 if total_alerts > 0 else 0
-            
-            return {
-                'kpis': {
-                    'critical_alerts': critical_alerts,
-                    'high_alerts': high_alerts,
-                    'medium_alerts': medium_alerts,
-                    'low_alerts': low_alerts,
-                    'recent_alerts_30min': recent_alerts,
-                    'total_active_alerts': total_alerts,
-                    'peak_hours_count': len(peak_hours),
-                    'avg_hourly_alerts': round(avg_hourly, 1),
-                    'most_common_type': alert_types_raw.index[0] if len(alert_types_raw) > 0 else 'N/A',
-                    'severity_ratio_critical': round((critical_alerts / total_alerts * 100), 1) if total_alerts > 0 else 0
-                },
-                'charts': {
-                    'severity_distribution': severity_distribution,
-                    'alert_types': alert_types_distribution,
-                    'hourly_distribution': hourly_data
-                }
-            }
+            return aggregate(RealtimeAlertsAggregate, data)
         except Exception as e:
             logger.error(f"Error analyzing real-time alerts: {str(e)}")
             return {'error': f'Error analyzing real-time alerts: {str(e)}'}
     
-    def analyze_event_processing(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def analyze_event_processing(self, data) -> Dict[str, Any]:
         """Analyze event processing metrics"""
         try:
-            # Calculate daily events
-            df['date'] = pd.to_datetime(df['date'])
-            df['events_count'] = pd.to_numeric(df['events_count'], errors='coerce')
-            df['alerts_generated'] = pd.to_numeric(df['alerts_generated'], errors='coerce')
-            df['processing_rate'] = pd.to_numeric(df['processing_rate'], errors='coerce')
-            
-            total_events = df['events_count'].sum()
-            total_alerts = df['alerts_generated'].sum()
-            avg_processing_rate = df['processing_rate'].mean()
-            
-            # Daily averages
-            daily_avg_events = df['events_count'].mean()
-            
-            # Processing efficiency over time
-            daily_processing = df.groupby('date').agg({
-                'events_count': 'sum',
-                'alerts_generated': 'sum',
-                'processing_rate': 'mean'
-            }).to_dict('index')
-            
-            return {
-                'kpis': {
-                    'events_per_day': f"{daily_avg_events/1000000:.1f}M",
-                    'alerts_generated': int(total_alerts),
-                    'processing_rate': f"{avg_processing_rate:.1f}%",
-                    'total_events_processed': int(total_events)
-                },
-                'charts': {
-                    'daily_events': {str(date): data['events_count'] for date, data in daily_processing.items()},
-                    'processing_efficiency': {str(date): data['processing_rate'] for date, data in daily_processing.items()}
-                }
-            }
+            return aggregate(EventProcessingAggregate, data)
         except Exception as e:
             return {'error': f'Error analyzing event processing: {str(e)}'}
     
@@ -247,22 +134,11 @@ class SOCAnalyzer:
         """Analyze system status and availability"""
         try:
             # System status metrics
-            systems_data = {}
-            operational_systems = 0
             total_systems = len(df)
-            
-            for _, row in df.iterrows():
-                system_name = row['system_name']
-                status = row['status']
-                availability = pd.to_numeric(row['availability_pct'], errors='coerce')
-                
-                systems_data[system_name] = {
-                    'status': status,
-                    'availability': availability
-                }
-                
-                if status == 'Operational' or availability >= 99:
-                    operational_systems += 1
+            system_names = df['system_name']
+            statuses = df['status']
+            availability = pd.to_numeric(df['availability_pct'], errors='coerce')
+            operational_systems = int(((statuses == 'Operational') | (availability >= 99)).sum())
             
             operational_percentage = (operational_systems / total_systems * 100) if total_systems > 0 else 0
             
@@ -278,8 +154,7 @@ class SOCAnalyzer:
                 },
                 'charts': {
                     'system_status': status_counts,
-                    'system_availability': {row['system_name']: pd.to_numeric(row['availability_pct'], errors='coerce') 
-                                          for _, row in df.iterrows()}
+                    'system_availability': dict(zip(system_names, availability.tolist()))
                 }
             }
         except Exception as e:
@@ -419,6 +294,7 @@ analyzer = SOCAnalyzer()
 
 @router.post("/inwi/upload")
 async def upload_file(
+    request: Request,
     file: UploadFile = File(...), 
     report_type: str = Form(...),
     current_user: auth_models.User = Depends(get_current_user)
@@ -436,23 +312,17 @@ async def upload_file(
         if report_type not in analyzer.report_types:
             raise HTTPException(status_code=400, detail="Invalid report type")
         
-        # Validate file size (max 10MB)
-        if file.size and file.size > 10 * 1024 * 1024:
-            raise HTTPException(status_code=400, detail="File too large (max 10MB)")
-        
-        # Read CSV file with error handling
-        csv_content = await file.read()
-        try:
-            df = pd.read_csv(io.StringIO(csv_content.decode('utf-8')))
-        except UnicodeDecodeError:
-            # Try with different encoding
-            df = pd.read_csv(io.StringIO(csv_content.decode('latin-1')))
-        
-        if df.empty:
-            raise HTTPException(status_code=400, detail="CSV file is empty")
-        
-        # Analyze data based on report type
-        analysis_result = analyzer.report_types[report_type](df)
+        # Validate file size: large files are only accepted for chunked report types
+        if file.size and file.size > settings.INWI_MAX_UPLOAD_MB * 1024 * 1024:
+            if report_type not in analyzer.chunked_report_types:
+                raise HTTPException(status_code=400, detail=f"File too large (max {settings.INWI_MAX_UPLOAD_MB}MB)")
+            if file.size > settings.INWI_MAX_CHUNKED_UPLOAD_MB * 1024 * 1024:
+                raise HTTPException(status_code=400, detail=f"File too large (max {settings.INWI_MAX_CHUNKED_UPLOAD_MB}MB)")
+            # The upload is already spooled to disk; analyze it without loading it whole
+            analysis_result, rows_processed, cache_status = await analyze_upload_stream(file.file, "inwi", report_type, analyzer, request)
+        else:
+            csv_content = await file.read()
+            analysis_result, rows_processed, cache_status = await analyze_upload(csv_content, "inwi", report_type, analyzer, request)
         
         logger.info(f"Successfully analyzed {report_type} report for user {current_user.email}")
         
@@ -461,7 +331,8 @@ async def upload_file(
             'report_type': report_type,
             'data': analysis_result,
             'filename': file.filename,
-            'rows_processed': len(df)
+            'rows_processed': rows_processed,
+            'cache': cache_status
         }
         
     except HTTPException:
@@ -472,6 +343,7 @@ async def upload_file(
 
 @router.post("/inwi/upload-test")
 async def upload_file_test(
+    request: Request,
     file: UploadFile = File(...), 
     report_type: str = Form(...)
 ):
@@ -488,23 +360,17 @@ async def upload_file_test(
         if report_type not in analyzer.report_types:
             raise HTTPException(status_code=400, detail="Invalid report type")
         
-        # Validate file size (max 10MB)
-        if file.size and file.size > 10 * 1024 * 1024:
-            raise HTTPException(status_code=400, detail="File too large (max 10MB)")
-        
-        # Read CSV file with error handling
-        csv_content = await file.read()
-        try:
-            df = pd.read_csv(io.StringIO(csv_content.decode('utf-8')))
-        except UnicodeDecodeError:
-            # Try with different encoding
-            df = pd.read_csv(io.StringIO(csv_content.decode('latin-1')))
-        
-        if df.empty:
-            raise HTTPException(status_code=400, detail="CSV file is empty")
-        
-        # Analyze data based on report type
-        analysis_result = analyzer.report_types[report_type](df)
+        # Validate file size: large files are only accepted for chunked report types
+        if file.size and file.size > settings.INWI_MAX_UPLOAD_MB * 1024 * 1024:
+            if report_type not in analyzer.chunked_report_types:
+                raise HTTPException(status_code=400, detail=f"File too large (max {settings.INWI_MAX_UPLOAD_MB}MB)")
+            if file.size > settings.INWI_MAX_CHUNKED_UPLOAD_MB * 1024 * 1024:
+                raise HTTPException(status_code=400, detail=f"File too large (max {settings.INWI_MAX_CHUNKED_UPLOAD_MB}MB)")
+            # The upload is already spooled to disk; analyze it without loading it whole
+            analysis_result, rows_processed, cache_status = await analyze_upload_stream(file.file, "inwi", report_type, analyzer, request)
+        else:
+            csv_content = await file.read()
+            analysis_result, rows_processed, cache_status = await analyze_upload(csv_content, "inwi", report_type, analyzer, request)
         
         logger.info(f"Successfully analyzed {report_type} report (test mode)")
         
@@ -513,7 +379,8 @@ async def upload_file_test(
             'report_type': report_type,
             'data': analysis_result,
             'filename': file.filename,
-            'rows_processed': len(df)
+            'rows_processed': rows_processed,
+            'cache': cache_status
         }
         
     except HTTPException:
@@ -1,11 +1,18 @@
-from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Depends
+from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Depends, Query, Request
+from fastapi.concurrency import run_in_threadpool
 import pandas as pd
-import io
 from datetime import datetime
 import numpy as np
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+from sqlalchemy.orm import Session
 from app.auth import models as auth_models
+from app.auth.admin_routes import require_permission
 from app.auth.auth_routes import get_current_user
+from app.inwi.analysis_cache import analyze_upload
+from app.inwi.batch import analyze_batch
+from app.inwi.csv_schemas import load_report_csv
+from app.inwi.history_store import HISTORY_MODELS, analyze_history, history_row_count, upsert_history
+from app.dashboard.database import get_db
 import logging
 
 # Configure logging
@@ -15,6 +22,9 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 class CISOAnalyzer:
+    # Part of the analysis cache key: bump when analysis output changes
+    version = 1
+
     def __init__(self):
         self.report_types = {
             'ciso_incident_report': self.analyze_incident_report,
@@ -474,6 +484,7 @@ analyzer = CISOAnalyzer()
 
 @router.post("/inwi2/upload")
 async def upload_file(
+    request: Request,
     file: UploadFile = File(...), 
     report_type: str = Form(...),
     current_user: auth_models.User = Depends(get_current_user)
@@ -497,36 +508,119 @@ async def upload_file(
         
         # Read CSV file with error handling
         csv_content = await file.read()
-        try:
-            df = pd.read_csv(io.StringIO(csv_content.decode('utf-8')))
-        except UnicodeDecodeError:
-            # Try with different encoding
-            df = pd.read_csv(io.StringIO(csv_content.decode('latin-1')))
+        analysis_result, rows_processed, cache_status = await analyze_upload(csv_content, "inwi2", report_type, analyzer, request)
+        
+        logger.info(f"Successfully analyzed {report_type} report for user {current_user.email}")
+        
+        return {
+            'success': True,
+            'report_type': report_type,
+            'data': analysis_result,
+            'filename': file.filename,
+            'rows_processed': rows_processed,
+            'cache': cache_status
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing CISO file: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
+
+@router.post("/inwi2/upload-batch")
+async def upload_batch(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    current_user: auth_models.User = Depends(get_current_user)
+):
+    """Analyze several report files (CSVs or zip archives) in one request; each file's report type is detected from its name or header"""
+    try:
+        return await analyze_batch(files, "inwi2", analyzer, request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
+
+@router.post("/inwi2/history/upload")
+async def upload_history(
+    file: UploadFile = File(...),
+    report_type: str = Form(...),
+    months: Optional[int] = Form(None, ge=1, le=120),
+    current_user: auth_models.User = Depends(require_permission("upload_files")),
+    db: Session = Depends(get_db)
+):
+    """
+    Store the rows of a report upload by date, then analyze the stored history
+
+    History is shared by every user: it is the organisation's CISO reporting,
+    so an upload overwrites the stored dates for everyone.
+    """
+    try:
+        logger.info(f"User {current_user.email} uploading CISO history file: {file.filename}")
+        
+        if not file.filename.endswith('.csv'):
+            raise HTTPException(status_code=400, detail="Only CSV files are supported")
         
+        if report_type not in HISTORY_MODELS:
+            raise HTTPException(status_code=400, detail="Report type has no stored history")
+        
+        if file.size and file.size > 10 * 1024 * 1024:
+            raise HTTPException(status_code=400, detail="File too large (max 10MB)")
+        
+        csv_content = await file.read()
+        df = await run_in_threadpool(load_report_csv, csv_content, "inwi2", report_type)
         if df.empty:
             raise HTTPException(status_code=400, detail="CSV file is empty")
+        if 'date' not in df.columns:
+            raise HTTPException(status_code=400, detail="CSV file has no date column")
         
-        # Analyze data based on report type
-        analysis_result = analyzer.report_types[report_type](df)
-        
-        logger.info(f"Successfully analyzed {report_type} report for user {current_user.email}")
+        rows_upserted = await run_in_threadpool(upsert_history, db, report_type, df)
+        if rows_upserted == 0:
+            raise HTTPException(status_code=400, detail="CSV file has no rows with a valid date")
+        analysis_result = await run_in_threadpool(analyze_history, db, report_type, months)
         
         return {
             'success': True,
             'report_type': report_type,
             'data': analysis_result,
             'filename': file.filename,
-            'rows_processed': len(df)
+            'rows_processed': len(df),
+            'rows_upserted': rows_upserted
         }
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error processing CISO file: {str(e)}")
+        await run_in_threadpool(db.rollback)
+        logger.error(f"Error storing CISO history: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
 
+@router.get("/inwi2/history/{report_type}")
+def get_history(
+    report_type: str,
+    months: Optional[int] = Query(None, ge=1, le=120),
+    current_user: auth_models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Analyze the shared stored history of a report type, optionally limited to the last `months` months"""
+    if report_type not in HISTORY_MODELS:
+        raise HTTPException(status_code=404, detail="Report type has no stored history")
+    
+    stored_rows = history_row_count(db, report_type)
+    if stored_rows == 0:
+        raise HTTPException(status_code=404, detail="No history stored for this report type")
+    
+    return {
+        'success': True,
+        'report_type': report_type,
+        'data': analyze_history(db, report_type, months),
+        'stored_rows': stored_rows
+    }
+
 @router.post("/inwi2/upload-test")
 async def upload_file_test(
+    request: Request,
     file: UploadFile = File(...), 
     report_type: str = Form(...)
 ):
@@ -549,17 +643,7 @@ async def upload_file_test(
         
         # Read CSV file with error handling
         csv_content = await file.read()
-        try:
-            df = pd.read_csv(io.StringIO(csv_content.decode('utf-8')))
-        except UnicodeDecodeError:
-            # Try with different encoding
-            df = pd.read_csv(io.StringIO(csv_content.decode('latin-1')))
-        
-        if df.empty:
-            raise HTTPException(status_code=400, detail="CSV file is empty")
-        
-        # Analyze data based on report type
-        analysis_result = analyzer.report_types[report_type](df)
+        analysis_result, rows_processed, cache_status = await analyze_upload(csv_content, "inwi2", report_type, analyzer, request)
         
         logger.info(f"Successfully analyzed {report_type} report (CISO test mode)")
         
@@ -568,7 +652,8 @@ async def upload_file_test(
             'report_type': report_type,
             'data': analysis_result,
             'filename': file.filename,
-            'rows_processed': len(df)
+            'rows_processed': rows_processed,
+            'cache': cache_status
         }
         
     except HTTPException:
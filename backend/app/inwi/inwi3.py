@@ -1,16 +1,23 @@
 # inwi3.py
-from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Depends
+from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Depends, Request
 import pandas as pd
-import io
 from datetime import datetime, timezone
-from typing import Dict, Any
+from typing import Dict, Any, List
 import logging
 from app.auth.auth_routes import get_current_user
+from app.inwi.analysis_cache import analyze_upload
+from app.inwi.batch import analyze_batch
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 class Inwi3StrategicAnalyzer:
+    # Part of the analysis cache key: bump when analysis output changes
+    version = 2
+
+    # asset_criticality labels for scores 5 down to 1
+    CRITICALITY_LEVELS = ['High', 'Medium-High', 'Medium', 'Low-Medium', 'Low']
+
     def __init__(self):
         self.report_types = {
             'strategic_risk_posture': self.analyze_risk_posture,
@@ -42,11 +49,11 @@ class Inwi3StrategicAnalyzer:
             avg_vuln_severity = float(df['vuln_severity'].mean()) if len(df) else 0.0
             incidents_total = int(df['incident_count'].sum())
 
-            patched = df['patch_status'].str.lower().isin(['patched', 'up-to-date']).sum()
+            patched = df['patch_status'].isin(['patched', 'up-to-date']).sum()
             total_assets = len(df)
             patch_coverage_pct = (patched / total_assets * 100) if total_assets > 0 else 0.0
 
-            by_criticality = df['asset_criticality'].value_counts(dropna=False).to_dict()
+            by_criticality = self._category_counts(df['asset_criticality'])
             top_risky_dict = self._get_top_risky_assets(df, avg_risk_score)
 
             return {
@@ -69,40 +76,59 @@ class Inwi3StrategicAnalyzer:
     # ---------------- Helper Methods ---------------- #
 
     def _prepare_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Ensure required columns exist and are safely formatted."""
-        df = df.copy()
-
+        """Ensure required columns exist and are safely formatted, in place."""
         df['asset_criticality'] = self._normalize_asset_criticality(df)
         df['incident_count'] = self._normalize_numeric(df, 'incident_count', default=0)
         df['vuln_severity'] = self._normalize_numeric(df, 'vuln_severity', default=0)
         df['score_risk'] = self._normalize_numeric(df, 'score_risk', default=0)
-        df['patch_status'] = self._normalize_text(df, 'patch_status', default='unknown')
+        df['patch_status'] = self._lower_category(self._normalize_text(df, 'patch_status', default='unknown'))
 
         return df
 
 
     def _normalize_asset_criticality(self, df: pd.DataFrame) -> pd.Series:
         """Convert asset_criticality values into text categories."""
+        levels = pd.CategoricalDtype(self.CRITICALITY_LEVELS)
         if 'asset_criticality' not in df.columns:
-            return pd.Series(['Medium'] * len(df))
+            return pd.Series('Medium', index=df.index, dtype=levels)
 
-        values = pd.to_numeric(df['asset_criticality'].fillna(3), errors='coerce').fillna(3)
-        mapping = {5: 'High', 4: 'Medium-High', 3: 'Medium', 2: 'Low-Medium', 1: 'Low'}
-        return values.map(mapping).fillna('Medium').astype(str)
+        values = pd.to_numeric(df['asset_criticality'], errors='coerce')
+        mapping = dict(zip([5, 4, 3, 2, 1], self.CRITICALITY_LEVELS))
+        return values.map(mapping).astype(levels).fillna('Medium')
 
 
     def _normalize_numeric(self, df: pd.DataFrame, col: str, default: float = 0) -> pd.Series:
         """Ensure a numeric column exists and is cleaned."""
         if col not in df.columns:
-            return pd.Series([default] * len(df))
+            return pd.Series(default, index=df.index)
         return pd.to_numeric(df[col], errors='coerce').fillna(default)
 
 
     def _normalize_text(self, df: pd.DataFrame, col: str, default: str) -> pd.Series:
         """Ensure a text column exists and fill missing values."""
         if col not in df.columns:
-            return pd.Series([default] * len(df))
-        return df[col].fillna(default).astype(str)
+            return pd.Series(default, index=df.index, dtype='category')
+        # String conversion and filling work on the distinct values, not every row
+        values = df[col].astype('category')
+        values = values.cat.rename_categories(values.cat.categories.astype(str))
+        if default not in values.cat.categories:
+            values = values.cat.add_categories([default])
+        return values.fillna(default)
+
+
+    def _lower_category(self, values: pd.Series) -> pd.Series:
+        """Lower-case a filled categorical text column, once per distinct value."""
+        lowered = values.cat.categories.str.lower()
+        # Case variants ('Patched', 'patched') merge into one category
+        categories = lowered.unique()
+        codes = categories.get_indexer(lowered).take(values.cat.codes)
+        return pd.Series(pd.Categorical.from_codes(codes, categories), index=values.index)
+
+
+    def _category_counts(self, values: pd.Series) -> Dict[str, int]:
+        """value_counts() of a categorical without its unused categories."""
+        counts = values.value_counts()
+        return counts[counts > 0].to_dict()
 
 
     def _get_top_risky_assets(self, df: pd.DataFrame, avg_risk_score: float) -> Dict[str, float]:
@@ -208,9 +234,9 @@ class Inwi3StrategicAnalyzer:
                 status_col = 'compliance_status'
             
             if status_col:
-                df['status'] = df[status_col].fillna('unknown').astype(str).str.lower()
+                df['status'] = self._lower_category(self._normalize_text(df, status_col, default='unknown'))
             else:
-                df['status'] = 'unknown'
+                df['status'] = pd.Series('unknown', index=df.index, dtype='category')
                 
             total_controls = len(df)
             compliant = int((df['status'].isin(['completed', 'compliant', 'passed'])).sum())
@@ -220,10 +246,14 @@ class Inwi3StrategicAnalyzer:
             compliance_pct = (compliant / total_controls * 100) if total_controls > 0 else 0.0
             
             # Handle missing columns for charts
-            if 'regulation' in df.columns:
-                by_framework = df.groupby('regulation')['status'].apply(lambda s: s.value_counts().to_dict()).to_dict()
-            elif 'framework' in df.columns:
-                by_framework = df.groupby('framework')['status'].apply(lambda s: s.value_counts().to_dict()).to_dict()
+            framework_col = 'regulation' if 'regulation' in df.columns else 'framework'
+            if framework_col in df.columns:
+                frameworks = df[framework_col].astype('category')
+                counts = df.groupby([frameworks, 'status'], observed=True).size().unstack(fill_value=0)
+                by_framework = {
+                    str(framework): row[row > 0].sort_values(ascending=False, kind='stable').to_dict()
+                    for framework, row in counts.iterrows()
+                }
             else:
                 by_framework = {'Unknown': {'compliant': compliant, 'non-compliant': non_compliant, 'in_progress': in_progress, 'unknown': unknown}}
 
@@ -311,15 +341,15 @@ class Inwi3StrategicAnalyzer:
             def get_unresolved_count() -> int:
                 if 'status' not in df.columns:
                     return 0
-                return int(df['status'].str.lower().isin(
-                    ['open', 'in_progress', 'pending', 'investigating']
-                ).sum())
+                status = self._lower_category(self._normalize_text(df, 'status', default='unknown'))
+                return int(status.isin(['open', 'in_progress', 'pending', 'investigating']).sum())
 
             def get_by_severity() -> Dict[str, Any]:
                 if 'severity' in df.columns:
+                    severity = df['severity'].astype('category')
                     if 'incident_id' in df.columns:
-                        return df.groupby('severity')['incident_id'].count().to_dict()
-                    return df['severity'].value_counts().to_dict()
+                        return df['incident_id'].groupby(severity, observed=True).count().to_dict()
+                    return self._category_counts(severity)
                 return {'Unknown': len(df)}
 
             # --- Main logic ---
@@ -467,22 +497,23 @@ analyzer = Inwi3StrategicAnalyzer()
 # === Upload endpoints ===
 
 @router.post("/inwi3/upload-test")
-async def upload_inwi3_test(file: UploadFile = File(...), report_type: str = Form(...)):
+async def upload_inwi3_test(request: Request, file: UploadFile = File(...), report_type: str = Form(...)):
     """Upload libre pour tests (pas d'auth)."""
-    return await _process_upload(file, report_type)
+    return await _process_upload(file, report_type, request)
 
 
 @router.post("/inwi3/upload")
 async def upload_inwi3(
+    request: Request,
     file: UploadFile = File(...),
     report_type: str = Form(...),
     current_user: dict = Depends(get_current_user)
 ):
     """Upload sécurisé avec authentification (Bearer token)."""
-    return await _process_upload(file, report_type)
+    return await _process_upload(file, report_type, request)
 
 
-async def _process_upload(file: UploadFile, report_type: str):
+async def _process_upload(file: UploadFile, report_type: str, request: Request):
     try:
         if not file:
             raise HTTPException(status_code=400, detail="No file provided")
@@ -492,21 +523,14 @@ async def _process_upload(file: UploadFile, report_type: str):
             raise HTTPException(status_code=400, detail="Invalid report type")
 
         content = await file.read()
-        try:
-            df = pd.read_csv(io.StringIO(content.decode('utf-8')))
-        except UnicodeDecodeError:
-            df = pd.read_csv(io.StringIO(content.decode('latin-1')))
-
-        if df.empty:
-            raise HTTPException(status_code=400, detail="CSV file is empty")
-
-        result = analyzer.report_types[report_type](df)
+        result, rows_processed, cache_status = await analyze_upload(content, "inwi3", report_type, analyzer, request)
         return {
             'success': True,
             'report_type': report_type,
             'data': result,
             'filename': file.filename,
-            'rows_processed': len(df)
+            'rows_processed': rows_processed,
+            'cache': cache_status
         }
     except HTTPException:
         raise
@@ -514,6 +538,21 @@ async def _process_upload(file: UploadFile, report_type: str):
         logger.exception("processing error")
         raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
 
+@router.post("/inwi3/upload-batch")
+async def upload_batch(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    current_user: dict = Depends(get_current_user)
+):
+    """Analyze several report files (CSVs or zip archives) in one request; each file's report type is detected from its name or header"""
+    try:
+        return await analyze_batch(files, "inwi3", analyzer, request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
+
 # === Healthcheck ===
 
 @router.get("/inwi3/health")
@@ -1,11 +1,14 @@
+import asyncio
 from datetime import datetime
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.inwi.inwi import router as inwi_router
 from app.inwi.inwi2 import router as inwi2_router
 from app.inwi.inwi3 import router as inwi3_router
-from app.inwi.export_service import router as export_router
+from app.inwi.export_service import router as export_router, export_workers
+from app.inwi.export_cache import export_cache
+from app.inwi.analysis_cache import analysis_workers
 from sqlalchemy import text
 import logging
 
@@ -15,15 +18,21 @@ from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 
 from .auth import security
+from .auth.permissions import reload_permission_ids
 from .core.config import settings
 from .core.security_headers import add_security_headers
+from .core.db_pool import pool_stats
+from .auth.admin_routes import get_admin_user
 
-from app.dashboard.database import engine as dashboard_engine
+from app.dashboard.database import engine as dashboard_engine, wait_for_db as wait_for_dashboard_db
 from app.dashboard import models as dashboard_models
-from app.auth.database import engine as auth_engine
+from app.auth.database import engine as auth_engine, wait_for_db as wait_for_auth_db
 from app.auth import models as auth_models
 
 from .init_db.init_db import seed_data
+from app.dashboard.notifications import kpi_broadcaster
+from app.auth.revocation import revocation_store
+from app.dashboard.dashbord_routes import build_dashboard_kpi_values
 from sqlalchemy.orm import Session
 from app.auth.database import SessionLocal
 
@@ -32,6 +41,10 @@ async def lifespan(_: FastAPI):
     """Application lifespan events"""
     print("Starting Security Dashboard API...")
     
+    print("Waiting for databases...")
+    await asyncio.to_thread(wait_for_auth_db)
+    await asyncio.to_thread(wait_for_dashboard_db)
+    
     print("Creating database tables...")
     auth_models.Base.metadata.create_all(bind=auth_engine)
     dashboard_models.Base.metadata.create_all(bind=dashboard_engine)
@@ -39,8 +52,30 @@ async def lifespan(_: FastAPI):
     print("Seeding initial data...")
     seed_data()
     
+    print("Loading permissions...")
+    db = SessionLocal()
+    try:
+        reload_permission_ids(db)
+    finally:
+        db.close()
+    
+    print("Loading revoked tokens...")
+    revocation_sync = asyncio.create_task(revocation_store.run_sync_loop())
+    
+    print("Starting KPI update listener...")
+    await kpi_broadcaster.start(build_dashboard_kpi_values)
+    
+    print("Starting export workers...")
+    export_workers.start()
+    export_cache_cleanup = asyncio.create_task(export_cache.run_cleanup_loop())
+    
     print("Application startup complete!")
     yield
+    await kpi_broadcaster.stop()
+    revocation_sync.cancel()
+    export_cache_cleanup.cancel()
+    analysis_workers.shutdown()
+    export_workers.shutdown()
     print("Application shutdown")
 
 app = FastAPI(
@@ -93,6 +128,15 @@ async def health_check():
             "error": "An internal error has occurred!"
         }
 
+# Metrics endpoint
+@app.get("/metrics", dependencies=[Depends(get_admin_user)])
+async def metrics():
+    """Connection pool utilization and checkout wait times"""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "db_pools": pool_stats()
+    }
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -0,0 +1,127 @@
+"""
+Dashboard read throughput at 100 concurrent clients: async def routes with
+inline queries (before) vs the plain def routes FastAPI runs in its
+threadpool (after)
+
+Both apps serve the real get_all_kpis and list_files endpoints over SQLite.
+Every query also sleeps QUERY_MS, standing in for the round trip to
+Postgres, which is time the worker spends waiting rather than computing.
+
+    cd backend && python scripts/bench_dashboard_routes.py
+"""
+import asyncio
+import contextlib
+import logging
+import os
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests"))
+import conftest  # noqa: E402,F401  (settings defaults)
+
+import httpx  # noqa: E402
+from fastapi import Depends, FastAPI, Query  # noqa: E402
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import Session, sessionmaker  # noqa: E402
+from sqlalchemy.pool import QueuePool  # noqa: E402
+
+from app.dashboard import dashbord_routes, models  # noqa: E402
+from app.dashboard.database import get_db  # noqa: E402
+
+CLIENTS = 100
+REQUESTS_PER_CLIENT = 10
+QUERY_MS = 20
+ROUTES = ("/dashboard/kpis", "/dashboard/files")
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+def build_session(path: str) -> sessionmaker:
+    engine = create_engine(
+        f"sqlite:///{path}", poolclass=QueuePool, pool_size=CLIENTS, max_overflow=0,
+        connect_args={"check_same_thread": False},
+    )
+    models.KPI.__table__.create(engine)
+    models.File.__table__.create(engine)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def network_round_trip(*args):
+        time.sleep(QUERY_MS / 1000)
+
+    TestSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with TestSession() as db:
+        db.add_all(
+            models.KPI(name=f"kpi {i}", level="Operational", type="gauge", category="ops", threshold=90.0, frequency="daily")
+            for i in range(50)
+        )
+        db.commit()
+    return TestSession
+
+def build_apps(TestSession: sessionmaker):
+    def get_test_db():
+        db = TestSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    viewer = SimpleNamespace(role=SimpleNamespace(name="Operational"))
+
+    after = FastAPI()
+    after.include_router(dashbord_routes.router)
+
+    # The same endpoints as async def routes running their queries inline,
+    # the way the router served them before
+    before = FastAPI()
+
+    @before.get("/dashboard/kpis")
+    async def get_all_kpis(skip: int = Query(0), limit: int = Query(100), db: Session = Depends(get_db)):
+        return dashbord_routes.get_all_kpis(skip, limit, db, viewer)
+
+    @before.get("/dashboard/files")
+    async def list_files(skip: int = Query(0), limit: int = Query(100), db: Session = Depends(get_db)):
+        return dashbord_routes.list_files(skip, limit, db, viewer)
+
+    for app in (before, after):
+        app.dependency_overrides[get_db] = get_test_db
+        app.dependency_overrides[dashbord_routes.get_current_user] = lambda: viewer
+    return {"before": before, "after": after}
+
+async def load(name: str, app: FastAPI):
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def run_client(index: int):
+            for request in range(REQUESTS_PER_CLIENT):
+                start = time.perf_counter()
+                response = await client.get(ROUTES[(index + request) % len(ROUTES)])
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(run_client(index) for index in range(CLIENTS)))
+        elapsed = time.perf_counter() - start
+
+    latency_ms = sorted(latency * 1000 for latency in latencies)
+    p95 = latency_ms[int(len(latency_ms) * 0.95) - 1]
+    return (
+        f"{name:6} req/s {len(latency_ms) / elapsed:7.1f}  "
+        f"p50 {statistics.median(latency_ms):7.1f} ms  p95 {p95:7.1f} ms"
+    )
+
+async def main(path: str):
+    apps = build_apps(build_session(path))
+    print(f"{CLIENTS} clients x {REQUESTS_PER_CLIENT} requests, {QUERY_MS} ms per query, cpus {os.cpu_count()}")
+    for name, app in apps.items():
+        # get_all_kpis prints the level filter on every call
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            result = await load(name, app)
+        print(result)
+
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(main(os.path.join(directory, "bench.db")))
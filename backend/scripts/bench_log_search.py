@@ -0,0 +1,155 @@
+"""
+Log search benchmark: plans and latency of /dashboard/logs/search on Postgres
+
+Creates the tools, files and logs tables in an empty database, fills logs
+with ROWS synthetic rows, builds the model's indexes, then sends each search
+below SAMPLES times through the real route with a different subnet each
+time. Prints the EXPLAIN ANALYZE of the first request of each search and
+the latency spread over all of them.
+
+    cd backend && python scripts/bench_log_search.py postgresql://user@host/bench_db [rows]
+
+The database must be a scratch one: existing tables of those names are dropped.
+"""
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests"))
+import conftest  # noqa: E402,F401  (settings defaults)
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import create_engine, event, text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.dashboard import dashbord_routes, models  # noqa: E402
+from app.dashboard.database import get_db  # noqa: E402
+
+ROWS = 10_000_000
+SAMPLES = 30
+TABLES = [models.Tool.__table__, models.File.__table__, models.Log.__table__]
+
+# Sources: half in 10/8, a fifth in 192.168/16, the rest anywhere
+FILL_SQL = """
+INSERT INTO logs (file_id, tool_id, status, event_time, action, severity, log_type, ip_source, ip_destination)
+SELECT
+    1, 1, 'success',
+    now() - (random() * interval '90 days'),
+    (ARRAY['allow', 'deny', 'drop'])[1 + (random() * 2.999)::int],
+    (ARRAY['low', 'medium', 'high', 'critical'])[1 + (random() * 3.999)::int],
+    'traffic',
+    CASE
+        WHEN r < 0.5 THEN ('10.' || (random() * 255)::int || '.' || (random() * 255)::int || '.' || (random() * 255)::int)::inet
+        WHEN r < 0.7 THEN ('192.168.' || (random() * 255)::int || '.' || (random() * 255)::int)::inet
+        ELSE ((1 + random() * 222)::int || '.' || (random() * 255)::int || '.' || (random() * 255)::int || '.' || (random() * 255)::int)::inet
+    END,
+    ('172.16.' || (random() * 255)::int || '.' || (random() * 255)::int)::inet
+FROM (SELECT random() AS r FROM generate_series(1, :rows)) AS rows
+"""
+
+def octet() -> int:
+    return random.randint(0, 255)
+
+# name -> builds the query string for one request
+SEARCHES = {
+    "ip_source in a /8 (half the table)": lambda: {"ip_source": "10.0.0.0/8"},
+    "ip_source in a /16": lambda: {"ip_source": f"10.{octet()}.0.0/16"},
+    "ip_source in a /24": lambda: {"ip_source": f"10.{octet()}.{octet()}.0/24"},
+    "ip_source exact address": lambda: {"ip_source": f"10.{octet()}.{octet()}.{octet()}"},
+    "ip on either side in a /24": lambda: {"ip": f"192.168.{octet()}.0/24"},
+    "ip_source /16 + severity + 7 days": lambda: {
+        "ip_source": f"10.{octet()}.0.0/16", "severity": "critical",
+        "start_date": (datetime.now(timezone.utc) - timedelta(days=7)).isoformat(),
+    },
+}
+
+def build_database(engine, rows: int) -> None:
+    models.Base.metadata.drop_all(engine, tables=TABLES[::-1])
+    models.Base.metadata.create_all(engine, tables=TABLES)
+    # Loading without the secondary indexes, then building them, is how a
+    # large table would be restored; it also keeps this script quick
+    indexes = list(models.Log.__table__.indexes)
+    with engine.begin() as conn:
+        for index in indexes:
+            index.drop(conn)
+        conn.execute(text("INSERT INTO tools (id, name, type, category) VALUES (1, 'bench', 'firewall', 'network')"))
+        conn.execute(text(
+            "INSERT INTO files (id, filename, file_path, file_type, uploaded_by, size, status, md5_hash) "
+            "VALUES (1, 'bench.csv', '/dev/null', 'csv', 1, 0, 'processed', '')"
+        ))
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(text(FILL_SQL), {"rows": rows})
+    print(f"loaded {rows} rows in {time.perf_counter() - start:.0f} s")
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        for index in indexes:
+            index.create(conn)
+    print(f"built {len(indexes)} indexes in {time.perf_counter() - start:.0f} s")
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE logs"))
+
+def build_client(engine) -> TestClient:
+    BenchSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def get_bench_db():
+        db = BenchSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(dashbord_routes.router)
+    app.dependency_overrides[get_db] = get_bench_db
+    app.dependency_overrides[dashbord_routes.get_current_user] = lambda: SimpleNamespace(
+        role=SimpleNamespace(name="Operational")
+    )
+    return TestClient(app)
+
+def main(dsn: str, rows: int) -> None:
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    random.seed(32)
+    engine = create_engine(dsn)
+    build_database(engine, rows)
+    client = build_client(engine)
+
+    searches = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "FROM logs" in statement:
+            searches.append((statement, parameters))
+
+    for name, build_params in SEARCHES.items():
+        latencies = []
+        for sample in range(SAMPLES):
+            params = build_params()
+            start = time.perf_counter()
+            response = client.get("/dashboard/logs/search", params=params)
+            latencies.append((time.perf_counter() - start) * 1000)
+            response.raise_for_status()
+            if sample == 0:
+                statement, parameters = searches[-1]
+                with engine.connect() as conn:
+                    cursor = conn.connection.cursor()
+                    cursor.execute("EXPLAIN (ANALYZE, BUFFERS, COSTS OFF) " + statement, parameters)
+                    plan = "\n".join(f"    {line}" for (line,) in cursor.fetchall())
+                first = params
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(f"\n{name}  e.g. {first}")
+        print(f"  p50 {statistics.median(latencies):.1f} ms  p95 {p95:.1f} ms  max {latencies[-1]:.1f} ms")
+        print(plan)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    main(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else ROWS)
@@ -0,0 +1,93 @@
+"""
+Login storm benchmark: bcrypt inline on the event loop vs the password pool
+
+Serves a login route and a cheap dashboard read from one app in one event
+loop, fires LOGINS concurrent logins, and meanwhile polls the read route
+READERS at a time. Reports login throughput and the read latency spread.
+No database is needed; the login route does only the password check.
+
+    cd backend && python scripts/bench_password_pool.py
+"""
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests"))
+import conftest  # noqa: E402,F401  (settings defaults)
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+from app.auth import security  # noqa: E402
+
+LOGINS = 32
+READERS = 8
+# Each reader means to send one read per interval; latency counts from that
+# intended send time, so reads delayed by a blocked loop are not hidden
+READ_INTERVAL = 0.05
+PASSWORD = "Correct-Horse-9"
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+def build_app(hashed: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/inline/login")
+    async def login_inline():
+        return {"ok": security.pwd_context.verify_and_update(PASSWORD, hashed)[0]}
+
+    @app.post("/pool/login")
+    async def login_pool():
+        return {"ok": (await security.verify_password_async(PASSWORD, hashed))[0]}
+
+    @app.get("/read")
+    async def read():
+        return {"kpis": []}
+
+    return app
+
+async def storm(client: httpx.AsyncClient, mode: str):
+    storm_end = None
+    read_latencies = []
+
+    async def reader():
+        # Runs until every read due before the storm ended has been answered
+        scheduled = time.perf_counter()
+        while storm_end is None or scheduled < storm_end:
+            await client.get("/read")
+            now = time.perf_counter()
+            read_latencies.append(now - scheduled)
+            # Reads that fell behind are sent at once, as a waiting client would
+            scheduled += READ_INTERVAL
+            await asyncio.sleep(max(0.0, scheduled - now))
+
+    readers = [asyncio.create_task(reader()) for _ in range(READERS)]
+    await asyncio.sleep(0.05)
+    start = time.perf_counter()
+    await asyncio.gather(*(client.post(f"/{mode}/login") for _ in range(LOGINS)))
+    storm_end = time.perf_counter()
+    elapsed = storm_end - start
+    await asyncio.gather(*readers)
+
+    read_ms = sorted(latency * 1000 for latency in read_latencies)
+    p95 = read_ms[int(len(read_ms) * 0.95) - 1]
+    print(
+        f"{mode:6} logins/s {LOGINS / elapsed:6.1f}  "
+        f"reads {len(read_ms):5}  read p50 {statistics.median(read_ms):7.1f} ms  "
+        f"p95 {p95:7.1f} ms  max {read_ms[-1]:7.1f} ms"
+    )
+
+async def main():
+    hashed = security.pwd_context.hash(PASSWORD)
+    transport = httpx.ASGITransport(app=build_app(hashed))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"bcrypt rounds {security.settings.BCRYPT_ROUNDS}, pool workers {security.settings.PASSWORD_HASH_WORKERS}, cpus {os.cpu_count()}")
+        for mode in ("inline", "pool"):
+            await storm(client, mode)
+
+if __name__ == "__main__":
+    asyncio.run(main())
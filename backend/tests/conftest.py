@@ -0,0 +1,21 @@
+import os
+import sys
+
+# app.core.config requires these; the tests never connect to a database or SMTP server
+for name in (
+    "ADMIN_EMAIL", "ADMIN_PASSWORD", "PASSWORD_SALT", "JWT_SECRET_KEY", "JWT_ALGORITHM",
+    "AUTH_POSTGRES_HOST", "AUTH_POSTGRES_USER", "AUTH_POSTGRES_PASSWORD", "AUTH_POSTGRES_DB",
+    "DASHBOARD_POSTGRES_HOST", "DASHBOARD_POSTGRES_USER", "DASHBOARD_POSTGRES_PASSWORD", "DASHBOARD_POSTGRES_DB",
+    "SMTP_HOST", "SMTP_USER", "SMTP_PASSWORD",
+):
+    os.environ.setdefault(name, "test")
+for name, value in (
+    ("AUTH_POSTGRES_PORT", "5432"), ("DASHBOARD_POSTGRES_PORT", "5432"), ("SMTP_PORT", "25"),
+    ("ACCESS_TOKEN_EXPIRE_MINUTES", "30"), ("REFRESH_TOKEN_EXPIRE_DAYS", "7"), ("CORS_ORIGINS", '["*"]'),
+):
+    os.environ.setdefault(name, value)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Sample report exports shipped with the repository
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data")
@@ -0,0 +1,36 @@
+import asyncio
+import io
+import os
+
+from app.core.config import settings
+from app.inwi import analysis_cache
+from app.inwi.inwi import analyzer
+
+from conftest import DATA_DIR
+
+with open(os.path.join(DATA_DIR, "sample_realtime_alerts.csv"), "rb") as f:
+    SAMPLE = f.read()
+
+async def _run_inline(func, *args, request=None):
+    return func(*args)
+
+def test_disk_cache_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "INWI_ANALYSIS_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(analysis_cache.analysis_workers, "run", _run_inline)
+    analysis_cache.analysis_cache.clear()
+
+    async def scenario():
+        miss = await analysis_cache.analyze_upload(SAMPLE, "inwi", "realtime_alerts", analyzer)
+        memory = await analysis_cache.analyze_upload(SAMPLE, "inwi", "realtime_alerts", analyzer)
+        analysis_cache.analysis_cache.clear()
+        disk = await analysis_cache.analyze_upload_stream(io.BytesIO(SAMPLE), "inwi", "realtime_alerts", analyzer)
+        return miss, memory, disk
+
+    try:
+        miss, memory, disk = asyncio.run(scenario())
+    finally:
+        analysis_cache.analysis_cache.clear()
+    assert [entry[2] for entry in (miss, memory, disk)] == ["miss", "memory", "disk"]
+    assert memory[:2] == miss[:2]
+    assert disk[1] == miss[1]
+    assert len(os.listdir(tmp_path)) == 1
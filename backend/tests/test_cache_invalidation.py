@@ -0,0 +1,46 @@
+from types import SimpleNamespace
+
+from app.auth import permissions
+from app.dashboard import notifications
+from app.dashboard.cache import kpi_dashboard_cache
+from app.init_db.create_triggers import CACHE_INVALIDATION_CHANNEL
+
+class FakeConnection:
+    def __init__(self, notifies):
+        self.notifies = notifies
+
+    def poll(self):
+        pass
+
+def test_user_invalidation_from_another_worker():
+    permissions.user_masks.set(5, 0b110)
+    permissions.effective_permissions_cache.set(5, [{"id": 1, "name": "view_dashboard"}])
+    permissions.user_masks.set(6, 0b10)
+    try:
+        notifications.dispatch_invalidation("user:5")
+        assert permissions.user_masks.get(5) is None
+        assert permissions.effective_permissions_cache.get(5) is None
+        assert permissions.user_masks.get(6) == 0b10
+    finally:
+        permissions.user_masks.clear()
+        permissions.effective_permissions_cache.clear()
+
+def test_invalidate_user_publishes(monkeypatch):
+    published = []
+    monkeypatch.setattr(permissions, "publish_invalidation", lambda kind, key: published.append((kind, key)))
+    permissions.invalidate_user(7)
+    assert published == [("user", "7")]
+
+def test_invalidation_notifies_leave_kpi_payloads_alone():
+    broadcaster = notifications.KPIUpdateBroadcaster()
+    broadcaster._conn = FakeConnection([SimpleNamespace(channel=CACHE_INVALIDATION_CHANNEL, payload="user:5")])
+    permissions.user_masks.set(5, 1)
+    kpi_dashboard_cache.set("operational", {"kpis": []})
+    try:
+        broadcaster._on_readable()
+        assert permissions.user_masks.get(5) is None
+        assert kpi_dashboard_cache.get("operational") == {"kpis": []}
+        assert broadcaster._refresh_task is None
+    finally:
+        permissions.user_masks.clear()
+        kpi_dashboard_cache.clear()
@@ -0,0 +1,37 @@
+import codecs
+import io
+import os
+
+from app.inwi.csv_schemas import iter_report_csv, load_report_csv, read_header
+from app.inwi.inwi import analyzer
+
+from conftest import DATA_DIR
+
+with open(os.path.join(DATA_DIR, "sample_realtime_alerts.csv"), "rb") as f:
+    SAMPLE = f.read()
+
+def _latin1(content: bytes) -> bytes:
+    # An e-acute in latin-1 is invalid utf-8, which forces the latin-1 fallback
+    return content.replace(b"Connexion admin suspecte", b"Connexion admin suspect\xe9", 1)
+
+def test_load_keeps_schema_columns():
+    df = load_report_csv(SAMPLE, "inwi", "realtime_alerts")
+    assert list(df.columns) == ["timestamp", "severity", "alert_type", "minutes_ago"]
+
+def test_utf8_bom_is_ignored():
+    plain = load_report_csv(SAMPLE, "inwi", "realtime_alerts")
+    with_bom = load_report_csv(codecs.BOM_UTF8 + SAMPLE, "inwi", "realtime_alerts")
+    assert list(with_bom.columns) == list(plain.columns)
+    assert read_header(codecs.BOM_UTF8 + SAMPLE)[0] == "timestamp"
+    assert analyzer.analyze_realtime_alerts(with_bom) == analyzer.analyze_realtime_alerts(plain)
+
+def test_utf8_bom_is_ignored_with_latin1_fallback():
+    df = load_report_csv(codecs.BOM_UTF8 + _latin1(SAMPLE), "inwi", "realtime_alerts")
+    assert list(df.columns) == ["timestamp", "severity", "alert_type", "minutes_ago"]
+    assert "Connexion admin suspecté" in set(df["alert_type"])
+
+def test_chunked_read_ignores_utf8_bom():
+    for content, encoding in ((SAMPLE, "utf-8"), (_latin1(SAMPLE), "latin-1")):
+        chunks = list(iter_report_csv(io.BytesIO(codecs.BOM_UTF8 + content), "inwi", "realtime_alerts", encoding, 5))
+        assert all(list(chunk.columns)[0] == "timestamp" for chunk in chunks)
+        assert sum(len(chunk) for chunk in chunks) == len(load_report_csv(content, "inwi", "realtime_alerts"))
@@ -0,0 +1,35 @@
+import os
+
+from app.inwi.export_cache import ExportCache
+
+def _store(cache, key, body=b"%PDF-1.4 cached"):
+    staging = cache.staging_path(key, "pdf")
+    with open(staging, "wb") as f:
+        f.write(body)
+    cache.put(staging, key, "pdf")
+
+def test_open_hit_survives_prune(tmp_path):
+    cache = ExportCache(str(tmp_path), ttl=60, max_bytes=10 ** 6)
+    key = ExportCache.key({"a": 1}, "summary", "pdf", 1)
+    _store(cache, key)
+
+    with cache.open(key, "pdf") as file:
+        # Another worker prunes the entry after it was looked up
+        os.remove(cache._path(key, "pdf"))
+        assert file.read() == b"%PDF-1.4 cached"
+
+def test_open_vanished_file_is_miss(tmp_path):
+    cache = ExportCache(str(tmp_path), ttl=60, max_bytes=10 ** 6)
+    key = ExportCache.key({"a": 1}, "summary", "pdf", 1)
+    _store(cache, key)
+    os.remove(cache._path(key, "pdf"))
+
+    assert cache.open(key, "pdf") is None
+
+def test_open_expired_file_is_miss(tmp_path):
+    cache = ExportCache(str(tmp_path), ttl=60, max_bytes=10 ** 6)
+    key = ExportCache.key({"a": 1}, "summary", "pdf", 1)
+    _store(cache, key)
+    os.utime(cache._path(key, "pdf"), (0, 0))
+
+    assert cache.open(key, "pdf") is None
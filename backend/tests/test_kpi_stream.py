@@ -0,0 +1,82 @@
+import asyncio
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from app.dashboard import dashbord_routes
+from app.dashboard.cache import kpi_dashboard_cache
+from app.dashboard.database import get_db
+
+STREAMS = 5
+
+def _build_payload(db, user_level):
+    db.execute(text("SELECT 1"))
+    return {"kpis": [], "level": user_level}
+
+async def _open_stream(app, path, started: asyncio.Event, done: asyncio.Event):
+    """Drive the ASGI app until the first event is sent, then hold the stream open until `done`"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": b"", "headers": [], "client": ("test", 1), "server": ("test", 80),
+    }
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            started.set()
+
+    await app(scope, receive, send)
+
+def test_open_streams_hold_no_pooled_connection(tmp_path, monkeypatch):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'kpi.db'}", poolclass=QueuePool, pool_size=1, max_overflow=STREAMS
+    )
+    TestSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(dashbord_routes, "SessionLocal", TestSession)
+    monkeypatch.setattr(dashbord_routes, "build_dashboard_kpi_values", _build_payload)
+    kpi_dashboard_cache.clear()
+
+    def get_test_db():
+        db = TestSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(dashbord_routes.router)
+    app.dependency_overrides[get_db] = get_test_db
+    app.dependency_overrides[dashbord_routes.get_current_user] = lambda: SimpleNamespace(
+        role=SimpleNamespace(name="viewer")
+    )
+    path = app.url_path_for("stream_dashboard_kpi_values")
+
+    async def scenario():
+        done = asyncio.Event()
+        started = [asyncio.Event() for _ in range(STREAMS)]
+        tasks = [asyncio.create_task(_open_stream(app, path, event, done)) for event in started]
+        for event in started:
+            await asyncio.wait_for(event.wait(), timeout=5)
+        checked_out = engine.pool.checkedout()
+        done.set()
+        await asyncio.wait_for(asyncio.gather(*tasks), timeout=5)
+        return checked_out
+
+    try:
+        assert asyncio.run(scenario()) == 0
+        assert engine.pool.checkedout() == 0
+    finally:
+        kpi_dashboard_cache.clear()
+        engine.dispose()
@@ -0,0 +1,23 @@
+import os
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+# Modules the calculator service keeps a copy of, since it ships in its own image
+SHARED_MODULES = [
+    ("backend/app/core/db_pool.py", "calculator_backend/core/db_pool.py"),
+    ("backend/app/core/time_buckets.py", "calculator_backend/core/time_buckets.py"),
+]
+
+def _body(path: str) -> str:
+    """Source without the leading comment header naming the source of truth"""
+    with open(os.path.join(ROOT, path), encoding="utf-8") as f:
+        lines = f.read().splitlines(keepends=True)
+    while lines and lines[0].startswith("#"):
+        lines.pop(0)
+    return "".join(lines)
+
+@pytest.mark.parametrize("source, copy", SHARED_MODULES)
+def test_calculator_copy_matches_source(source, copy):
+    assert _body(copy) == _body(source), f"{copy} has drifted from {source}"
@@ -0,0 +1,43 @@
+"""
+SOCAnalyzer output on every sample export, against fixtures recorded from
+the analyzer before it was vectorized
+
+Every report type runs on every sample file, so the error payloads for
+mismatched files are pinned as well as the real reports.
+"""
+import glob
+import json
+import os
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+
+from app.inwi.csv_schemas import load_report_csv
+from app.inwi.inwi import analyzer
+
+from conftest import DATA_DIR
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "soc_analyzer_golden.json")
+
+with open(FIXTURE, encoding="utf-8") as f:
+    GOLDEN = json.load(f)
+
+SAMPLES = sorted(glob.glob(os.path.join(DATA_DIR, "sample_*.csv")))
+
+def _normalized(result) -> str:
+    # Compared as JSON text, the form the API returns, so NaN equals NaN
+    return json.dumps(jsonable_encoder(result), sort_keys=True)
+
+def test_fixture_covers_every_sample_and_report_type():
+    assert sorted(GOLDEN) == [os.path.basename(path) for path in SAMPLES]
+    for outputs in GOLDEN.values():
+        assert sorted(outputs) == sorted(analyzer.report_types)
+
+@pytest.mark.parametrize("path", SAMPLES, ids=os.path.basename)
+@pytest.mark.parametrize("report_type", sorted(analyzer.report_types))
+def test_matches_golden_output(path, report_type):
+    with open(path, "rb") as f:
+        content = f.read()
+    df = load_report_csv(content, "inwi", report_type)
+    result = analyzer.report_types[report_type](df)
+    assert _normalized(result) == _normalized(GOLDEN[os.path.basename(path)][report_type])
@@ -0,0 +1,28 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import time_buckets
+from app.dashboard import dashbord_routes
+from app.dashboard.database import get_db
+
+@pytest.mark.parametrize("bucket", ["1 hour", "15 minutes", " 2 Days ", "1 week", "3 months", "10day"])
+def test_accepts_positive_intervals(bucket):
+    assert time_buckets.is_valid_bucket(bucket)
+
+@pytest.mark.parametrize("bucket", ["0 hour", "00 day", "-1 day", "1.5 hour", "1 year", "hour", "1 hour; DROP TABLE kpis"])
+def test_rejects_invalid_intervals(bucket):
+    assert not time_buckets.is_valid_bucket(bucket)
+
+def test_zero_bucket_is_a_bad_request():
+    app = FastAPI()
+    app.include_router(dashbord_routes.router)
+    # The bucket is validated before the session is used
+    app.dependency_overrides[get_db] = lambda: None
+    app.dependency_overrides[dashbord_routes.get_current_user] = lambda: SimpleNamespace(
+        role=SimpleNamespace(name="viewer")
+    )
+    response = TestClient(app).get(app.url_path_for("get_kpi_values"), params={"kpi_id": 1, "bucket": "0 hour"})
+    assert response.status_code == 400
@@ -8,8 +8,18 @@ class Settings(BaseSettings):
     DASHBOARD_POSTGRES_PASSWORD: str
     DASHBOARD_POSTGRES_DB: str
     
+    # Connection pool
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: int = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 60000
+    
     # Security
     CORS_ORIGINS: list
+    # Bearer token required by /metrics; empty disables the endpoint
+    METRICS_TOKEN: str = ""
     
     class Config:
         env_file = ".env"
@@ -1,11 +1,29 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey, func
+import threading
+from typing import Optional
+
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, func
+from sqlalchemy.engine import Engine
+from sqlalchemy.dialects.postgresql import INET
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from .config import settings
+from .db_pool import build_engine
 
 SQLALCHEMY_DATABASE_URL = f"postgresql://{settings.DASHBOARD_POSTGRES_USER}:{settings.DASHBOARD_POSTGRES_PASSWORD}@{settings.DASHBOARD_POSTGRES_HOST}:{settings.DASHBOARD_POSTGRES_PORT}/{settings.DASHBOARD_POSTGRES_DB}"
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+
+def get_engine() -> Engine:
+    """The pooled engine, built on first use so DB_POOL_* settings can still be changed before then"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = build_engine(SQLALCHEMY_DATABASE_URL, "dashboard")
+                SessionLocal.configure(bind=_engine)
+    return _engine
 Base = declarative_base()
 
 # Database models (simplified versions of what's in dashboard)
@@ -41,10 +59,11 @@ class Log(Base):
     severity = Column(String, nullable=True)
     cvss_base_score = Column(Float, nullable=True)
     vulnerability_name = Column(String, nullable=True)
-    ip_source = Column(String, nullable=True)
+    ip_source = Column(INET, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 def get_db():
+    get_engine()
     db = SessionLocal()
     try:
         yield db
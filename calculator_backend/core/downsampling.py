@@ -0,0 +1,55 @@
+from typing import List, Sequence, Tuple
+
+def lttb(points: Sequence[Tuple[float, float]], threshold: int) -> List[int]:
+    """
+    Largest-Triangle-Three-Buckets downsampling
+
+    Args:
+        points: (x, y) pairs sorted by x
+        threshold: Maximum number of points to keep
+
+    Returns:
+        Indexes of the points to keep, in ascending order
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    selected = [0]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third vertex of the triangle
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        span = next_end - next_start
+        avg_x = sum(points[j][0] for j in range(next_start, next_end)) / span
+        avg_y = sum(points[j][1] for j in range(next_start, next_end)) / span
+
+        # Keep the point of the current bucket forming the largest triangle
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        ax, ay = points[a]
+        max_area = -1.0
+        chosen = start
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (points[j][1] - ay) - (ax - points[j][0]) * (avg_y - ay))
+            if area > max_area:
+                max_area = area
+                chosen = j
+
+        selected.append(chosen)
+        a = chosen
+
+    selected.append(n - 1)
+    return selected
+
+def evenly_spaced(n: int, threshold: int) -> List[int]:
+    """Indexes of `threshold` evenly spaced items out of `n`, always keeping the last one"""
+    if threshold >= n:
+        return list(range(n))
+    if threshold <= 1:
+        return [n - 1] if threshold == 1 else []
+    step = (n - 1) / (threshold - 1)
+    return sorted({round(i * step) for i in range(threshold)})
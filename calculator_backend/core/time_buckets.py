@@ -0,0 +1,11 @@
+# Copy of backend/app/core/time_buckets.py, the source of truth: this service ships
+# in its own image. backend/tests/test_shared_modules.py checks that the two stay
+# identical below this header.
+import re
+
+# The count must be at least 1: time_bucket() rejects zero-width intervals
+BUCKET_PATTERN = re.compile(r"^\s*[1-9]\d*\s*(minute|hour|day|week|month)s?\s*$", re.IGNORECASE)
+
+def is_valid_bucket(bucket: str) -> bool:
+    """Whether `bucket` is a '<n> minute|hour|day|week|month' interval with n >= 1"""
+    return BUCKET_PATTERN.match(bucket) is not None
@@ -1,9 +1,10 @@
-from fastapi import FastAPI, HTTPException, Depends, status, Query
+from fastapi import FastAPI, HTTPException, Depends, Header, status, Query
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field, field_validator
 import logging
+import hmac
 import json
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Any, Optional, Union
 from sqlalchemy.orm import Session
 from sqlalchemy import text, select
@@ -14,9 +15,13 @@ from functools import wraps
 import traceback
 from enum import Enum
 
+from core.config import settings
 from core.logging import setup_logger
 from core.database import get_db
 from core.database import KPI, KPIValue
+from core.downsampling import lttb, evenly_spaced
+from core.time_buckets import is_valid_bucket
+from core.db_pool import pool_stats
 
 # Configuration
 class Config:
@@ -25,6 +30,8 @@ class Config:
     MAX_KPI_BATCH_SIZE = 100
     DEFAULT_HISTORY_LIMIT = 10
     MAX_HISTORY_LIMIT = 1000
+    MAX_HISTORY_BUCKETS = 5000
+    MAX_DOWNSAMPLED_POINTS = 5000
     DASHBOARD_SERVICE_URL = "http://backend:8000"
 
 # Custom Exceptions
@@ -724,15 +731,9 @@ async def get_latest_kpis(db: Session = Depends(get_db)):
         # Get all KPIs with their latest values
         try:
             result = db.execute(text("""
-                SELECT k.name, k.description, kv.value, kv.timestamp, k.unit, k.target
+                SELECT k.name, k.description, kl.current_value, kl.current_calculated_at, k.unit, k.target
                 FROM kpis k
-                LEFT JOIN LATERAL (
-                    SELECT kv2.value, kv2.timestamp
-                    FROM kpi_values kv2
-                    WHERE kv2.kpi_id = k.id
-                    ORDER BY kv2.timestamp DESC
-                    LIMIT 1
-                ) kv ON true
+                LEFT JOIN kpi_latest kl ON kl.kpi_id = k.id
                 ORDER BY k.name
             """)).fetchall()
         except SQLAlchemyError as e:
@@ -775,10 +776,103 @@ async def get_latest_kpis(db: Session = Depends(get_db)):
             detail=f"Failed to fetch latest KPIs: {str(e)}"
         )
 
+# Numeric KPIs are stored as {"value": <number>}; anything else has no scalar to aggregate
+NUMERIC_VALUE_SQL = """
+    CASE WHEN jsonb_typeof(kv.value->'value') = 'number'
+         THEN (kv.value->>'value')::double precision END
+"""
+
+def fetch_bucketed_history(db: Session, kpi_name: str, bucket: str,
+                           start: Optional[datetime], end: Optional[datetime]) -> List[Dict[str, Any]]:
+    """Aggregate KPI history into time buckets (min/max/avg over numeric values, last raw value)"""
+    rows = db.execute(text(f"""
+        SELECT * FROM (
+            SELECT time_bucket(CAST(:bucket AS interval), kv.timestamp) AS bucket,
+                   MIN({NUMERIC_VALUE_SQL}) AS min,
+                   MAX({NUMERIC_VALUE_SQL}) AS max,
+                   AVG({NUMERIC_VALUE_SQL}) AS avg,
+                   last(kv.value, kv.timestamp) AS last,
+                   COUNT(*) AS count
+            FROM kpi_values kv
+            JOIN kpis k ON kv.kpi_id = k.id
+            WHERE k.name = :kpi_name
+              AND (CAST(:start AS timestamptz) IS NULL OR kv.timestamp >= :start)
+              AND (CAST(:end AS timestamptz) IS NULL OR kv.timestamp <= :end)
+            GROUP BY bucket
+            ORDER BY bucket DESC
+            LIMIT :max_buckets
+        ) recent
+        ORDER BY bucket
+    """), {
+        "bucket": bucket,
+        "kpi_name": kpi_name,
+        "start": start,
+        "end": end,
+        "max_buckets": Config.MAX_HISTORY_BUCKETS
+    }).fetchall()
+    
+    return [
+        {
+            "timestamp": row[0].isoformat(),
+            "min": row[1],
+            "max": row[2],
+            "avg": row[3],
+            "last": row[4],
+            "count": row[5]
+        }
+        for row in rows
+    ]
+
+def fetch_downsampled_history(db: Session, kpi_name: str, max_points: int,
+                              start: datetime, end: Optional[datetime]) -> List[Dict[str, Any]]:
+    """Downsample KPI history to at most max_points using LTTB on numeric values"""
+    # Naive datetimes are taken as UTC so the range can be measured
+    start = start if start.tzinfo else start.replace(tzinfo=timezone.utc)
+    end = end or datetime.now(timezone.utc)
+    end = end if end.tzinfo else end.replace(tzinfo=timezone.utc)
+    if end <= start:
+        raise ValidationError("end must be after start", "INVALID_HISTORY_RANGE")
+    
+    # Pre-aggregate in SQL: the lowest and highest point of each of 2*max_points
+    # buckets, so LTTB runs on at most ~4*max_points rows whatever the range holds
+    width = max((end - start) / (2 * max_points), timedelta(seconds=1))
+    rows = db.execute(text(f"""
+        SELECT value, timestamp, numeric_value FROM (
+            SELECT kv.value, kv.timestamp, {NUMERIC_VALUE_SQL} AS numeric_value,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY time_bucket(CAST(:width AS interval), kv.timestamp, CAST(:start AS timestamptz))
+                       ORDER BY {NUMERIC_VALUE_SQL} ASC NULLS LAST, kv.timestamp DESC
+                   ) AS low_rank,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY time_bucket(CAST(:width AS interval), kv.timestamp, CAST(:start AS timestamptz))
+                       ORDER BY {NUMERIC_VALUE_SQL} DESC NULLS LAST, kv.timestamp DESC
+                   ) AS high_rank
+            FROM kpi_values kv
+            JOIN kpis k ON kv.kpi_id = k.id
+            WHERE k.name = :kpi_name
+              AND kv.timestamp >= :start
+              AND kv.timestamp <= :end
+        ) ranked
+        WHERE low_rank = 1 OR high_rank = 1
+        ORDER BY timestamp
+    """), {"kpi_name": kpi_name, "start": start, "end": end, "width": width}).fetchall()
+    
+    if rows and all(row[2] is not None for row in rows):
+        keep = lttb([(row[1].timestamp(), row[2]) for row in rows], max_points)
+    else:
+        # Lists and trends have no scalar to preserve the shape of
+        keep = evenly_spaced(len(rows), max_points)
+    
+    return [{"value": rows[i][0], "timestamp": rows[i][1].isoformat()} for i in keep]
+
 @app.get("/kpis/{kpi_name}/history", response_model=KPIHistoryResponse)
 async def get_kpi_history(
     kpi_name: str, 
     limit: int = Query(Config.DEFAULT_HISTORY_LIMIT, ge=1, le=Config.MAX_HISTORY_LIMIT, description="Number of historical records to retrieve"),
+    bucket: Optional[str] = Query(None, description="Aggregate into time buckets, e.g. '1 hour', '1 day', '1 week'"),
+    max_points: Optional[int] = Query(None, ge=3, le=Config.MAX_DOWNSAMPLED_POINTS, description="Downsample the series to at most this many points (LTTB); requires start"),
+    start: Optional[datetime] = Query(None, description="Start of the time range"),
+    end: Optional[datetime] = Query(None, description="End of the time range"),
     db: Session = Depends(get_db)
 ):
     """Get historical values for a specific KPI with enhanced validation"""
@@ -786,32 +880,53 @@ async def get_kpi_history(
     if not kpi_name or len(kpi_name.strip()) == 0:
         raise ValidationError("KPI name cannot be empty", "INVALID_KPI_NAME")
     
+    if bucket and max_points:
+        raise ValidationError("Use either bucket or max_points, not both", "INVALID_HISTORY_MODE")
+    
+    if max_points and start is None:
+        raise ValidationError("max_points requires start", "INVALID_HISTORY_RANGE")
+    
+    if bucket and not is_valid_bucket(bucket):
+        raise ValidationError(
+            "Bucket must look like '<n> minute|hour|day|week|month' with n >= 1", "INVALID_BUCKET"
+        )
+    
     kpi_name = kpi_name.strip()
     
     try:
-        logger.debug(f"Fetching history for KPI: {kpi_name} (limit: {limit})")
+        logger.debug(f"Fetching history for KPI: {kpi_name} (limit: {limit}, bucket: {bucket}, max_points: {max_points})")
         
         # Execute query with parameters
         try:
-            rows = db.execute(text("""
-                SELECT kv.value, kv.timestamp
-                FROM kpi_values kv
-                JOIN kpis k ON kv.kpi_id = k.id
-                WHERE k.name = :kpi_name
-                ORDER BY kv.timestamp DESC
-                LIMIT :limit
-            """), {"kpi_name": kpi_name, "limit": limit}).fetchall()
+            if bucket:
+                history = fetch_bucketed_history(db, kpi_name, bucket, start, end)
+                metadata = {"mode": "bucket", "bucket": bucket}
+            elif max_points:
+                history = fetch_downsampled_history(db, kpi_name, max_points, start, end)
+                metadata = {"mode": "downsampled", "max_points": max_points}
+            else:
+                rows = db.execute(text("""
+                    SELECT kv.value, kv.timestamp
+                    FROM kpi_values kv
+                    JOIN kpis k ON kv.kpi_id = k.id
+                    WHERE k.name = :kpi_name
+                      AND (CAST(:start AS timestamptz) IS NULL OR kv.timestamp >= :start)
+                      AND (CAST(:end AS timestamptz) IS NULL OR kv.timestamp <= :end)
+                    ORDER BY kv.timestamp DESC
+                    LIMIT :limit
+                """), {"kpi_name": kpi_name, "start": start, "end": end, "limit": limit}).fetchall()
+                
+                history = []
+                for row in rows:
+                    history.append({
+                        "value": row[0],
+                        "timestamp": row[1].isoformat()
+                    })
+                metadata = {"mode": "raw", "limit_used": limit}
         except SQLAlchemyError as e:
             logger.error(f"Database error fetching KPI history for {kpi_name}: {str(e)}")
             raise DatabaseError(f"Failed to fetch KPI history: {str(e)}", "KPI_HISTORY_FETCH_FAILED")
         
-        history = []
-        for row in rows:
-            history.append({
-                "value": row[0],
-                "timestamp": row[1].isoformat()
-            })
-        
         logger.info(f"Successfully fetched {len(history)} history records for KPI: {kpi_name}")
         
         return KPIHistoryResponse(
@@ -819,10 +934,10 @@ async def get_kpi_history(
             kpi_name=kpi_name,
             history=history,
             count=len(history),
-            metadata={"limit_used": limit}
+            metadata=metadata
         )
         
-    except (DatabaseError, CalculationError):
+    except (DatabaseError, CalculationError, ValidationError):
         raise
     except Exception as e:
         logger.error(f"Error fetching KPI history for {kpi_name}: {str(e)}", exc_info=True)
@@ -852,6 +967,26 @@ async def health_check(db: Session = Depends(get_db)):
         database_status=database_status
     )
 
+def require_metrics_token(authorization: Optional[str] = Header(None)):
+    """Pool internals are only served to callers holding METRICS_TOKEN"""
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not hmac.compare_digest(authorization or "", f"Bearer {settings.METRICS_TOKEN}"):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+@app.get("/metrics", dependencies=[Depends(require_metrics_token)])
+async def metrics():
+    """Connection pool utilization and checkout wait times"""
+    return {
+        "service": "calculator_backend",
+        "timestamp": datetime.now().isoformat(),
+        "db_pools": pool_stats()
+    }
+
 @app.get("/")
 async def root():
     """Root endpoint with service information"""
@@ -20,6 +20,7 @@ class Normalizer:
     policy: Optional[str] = field(default=None)
     bandwidth: Optional[int] = field(default=None)
     ip_source: Optional[str] = field(default=None)
+    host: Optional[str] = field(default=None)
     ip_destination: Optional[str] = field(default=None)
     severity: Optional[str] = field(default=None)
     cvss_base_score: Optional[float] = field(default=None)
@@ -35,6 +36,7 @@ class Normalizer:
         self._validate_severity()
         self._validate_bandwidth()
         self._validate_cvss_score()
+        self._split_host()
         self._validate_ips()
 
     def _normalize_event_time(self):
@@ -70,6 +72,16 @@ class Normalizer:
         if self.cvss_base_score is not None and not (0.0 <= self.cvss_base_score <= 10.0):
             raise ValueError("CVSS base score must be between 0.0 and 10.0")
 
+    def _split_host(self):
+        # Reports without an address for the source (e.g. Nessus hosts with no
+        # host-ip tag) carry its name instead; keep it as the host
+        if self.ip_source is not None:
+            try:
+                ipaddress.ip_address(self.ip_source)
+            except ValueError:
+                self.host = self.host or self.ip_source
+                self.ip_source = None
+
     def _validate_ips(self):
         for attr in ('ip_source', 'ip_destination'):
             ip = getattr(self, attr)
@@ -101,6 +113,7 @@ class Normalizer:
             "policy": data.get("policy"),
             "bandwidth": data.get("bandwidth"),
             "ip_source": data.get("ip_source"),
+            "host": data.get("host"),
             "ip_destination": data.get("ip_destination"),
             "severity": data.get("severity"),
             "cvss_base_score": data.get("cvss_base_score"),